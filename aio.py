@@ -0,0 +1,220 @@
+import asyncio
+from datetime import datetime
+
+from flask import abort, current_app, g, render_template, request
+from sqlalchemy import select
+
+import queries
+import search
+from cache import detail_cache
+from conditional import make_etag, not_modified, conditional
+from choices import genres_choices, state_choices
+from models import Venue, Artist, Show
+from pagination import keyset_rows
+
+
+class AsyncDatabase:
+    '''
+    Pooled async engines (ASYNC_DATABASE_DRIVER, asyncpg by default) on the primary and the
+    replica binds, used by the async views served by asgi.py. Each query runs in a session of
+    its own, so that the independent queries of a request are awaited concurrently on separate
+    pooled connections. Reads go to the replica route_reads picked for the request, if any.
+    The engines of each app are kept in app.extensions['async_db'].
+    '''
+
+    def init_app(self, app):
+        app.extensions['async_db'] = {}
+
+    @staticmethod
+    def _create_engine(config, bind):
+        from sqlalchemy.engine import make_url
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        uri = config['SQLALCHEMY_BINDS'][bind] if bind else config['SQLALCHEMY_DATABASE_URI']
+        connect_args = {}
+        if config['DB_STATEMENT_TIMEOUT_MS']:
+            connect_args['server_settings'] = {'statement_timeout': str(config['DB_STATEMENT_TIMEOUT_MS'])}
+
+        return create_async_engine(
+            make_url(uri).set(drivername=config['ASYNC_DATABASE_DRIVER']),
+            pool_size=config['DB_POOL_SIZE'],
+            max_overflow=config['DB_MAX_OVERFLOW'],
+            pool_timeout=config['DB_POOL_TIMEOUT'],
+            pool_recycle=config['DB_POOL_RECYCLE'],
+            pool_pre_ping=config['DB_POOL_PRE_PING'],
+            # The async views only read, so their statements skip the BEGIN and ROLLBACK round trips
+            isolation_level='AUTOCOMMIT',
+            connect_args=connect_args)
+
+    def engine(self):
+        '''
+        The engine of the request's bind, created on first use
+        '''
+        engines = current_app.extensions['async_db']
+        bind = g.get('replica')
+        if bind not in engines:
+            engines[bind] = self._create_engine(current_app.config, bind)
+        return engines[bind]
+
+    def _session(self):
+        from sqlalchemy.ext.asyncio import AsyncSession
+        return AsyncSession(self.engine())
+
+    async def all(self, query):
+        '''
+        Rows of a Query built by the queries module, or of a select
+        '''
+        async with self._session() as session:
+            result = await session.execute(getattr(query, 'statement', query))
+            return result.all()
+
+    async def first(self, statement):
+        '''
+        First entity selected by the statement, or None
+        '''
+        async with self._session() as session:
+            result = await session.execute(statement)
+            return result.scalars().first()
+
+    async def dispose(self, app):
+        for engine in app.extensions['async_db'].values():
+            await engine.dispose()
+        app.extensions['async_db'].clear()
+
+
+async_db = AsyncDatabase()
+
+
+async def venues():
+    filters = queries.location_filters(request.args)
+    limit = current_app.config['PAGE_SIZE']
+
+    try:
+        query = queries.venue_areas_query(request.args.get('after'), limit, **filters)
+    except ValueError:
+        abort(400)
+
+    rows, next_cursor = keyset_rows(await async_db.all(query), queries.VENUE_ORDER, limit)
+    areas = queries.group_areas(rows)
+
+    etag = make_etag(areas, next_cursor, filters)
+    response = not_modified(etag)
+    if response:
+        return response
+
+    return conditional(render_template('pages/venues.html', areas=areas, next_cursor=next_cursor,
+        filters=filters, genres=genres_choices, states=state_choices), etag)
+
+
+async def artists():
+    filters = queries.location_filters(request.args)
+    limit = current_app.config['PAGE_SIZE']
+
+    try:
+        query = queries.artist_page_query(request.args.get('after'), limit, **filters)
+    except ValueError:
+        abort(400)
+
+    rows, next_cursor = keyset_rows(await async_db.all(query), queries.ARTIST_ORDER, limit)
+    data = [{'id': a.id, 'name': a.name} for a in rows]
+
+    etag = make_etag(data, next_cursor, filters)
+    response = not_modified(etag)
+    if response:
+        return response
+
+    return conditional(render_template('pages/artists.html', artists=data, next_cursor=next_cursor,
+        filters=filters, genres=genres_choices, states=state_choices), etag)
+
+
+async def shows():
+    filters = queries.show_filters(request.args)
+    limit = current_app.config['PAGE_SIZE']
+
+    try:
+        query = queries.show_page_query(request.args.get('after'), limit, filters)
+    except ValueError:
+        abort(400)
+
+    rows, next_cursor = keyset_rows(await async_db.all(query), queries.SHOW_ORDER, limit)
+
+    if not rows and not filters:
+        abort(404)
+
+    data = [queries.format_show(r) for r in rows]
+
+    etag = make_etag(data, next_cursor, filters)
+    response = not_modified(etag)
+    if response:
+        return response
+
+    return conditional(render_template('pages/shows.html', shows=data, next_cursor=next_cursor,
+        filters=filters, states=state_choices), etag)
+
+
+async def _search(model, template):
+    term = request.form.get('search_term', '')
+    rows = await async_db.all(search.ranked_search_query(model, term, current_app.config['SEARCH_RESULT_LIMIT']))
+
+    return render_template(template, results=search.format_results(rows), search_term=term)
+
+
+async def search_venues():
+    return await _search(Venue, 'pages/search_venues.html')
+
+
+async def search_artists():
+    return await _search(Artist, 'pages/search_artists.html')
+
+
+async def _detail(kind, model, show_key, id):
+    now = datetime.now()
+    validator = await async_db.all(queries.detail_validator_query(model, id, now))
+
+    if not validator:
+        abort(404)
+
+    etag, last_modified = queries.detail_validators(validator[0])
+    response = not_modified(etag, last_modified)
+    if response:
+        return response
+
+    payload = detail_cache.get(kind, id, etag)
+
+    if not payload:
+        shows = queries.show_feed().filter(show_key == id).order_by(*queries.SHOW_ORDER)
+
+        entity, past_rows, upcoming_rows = await asyncio.gather(
+            async_db.first(select(model).filter_by(id=id)),
+            async_db.all(shows.filter(Show.start_time < now)),
+            async_db.all(shows.filter(Show.start_time > now))
+        )
+
+        if not entity:
+            abort(404)
+
+        upcoming_shows = [queries.format_show(r) for r in upcoming_rows]
+        payload = queries.detail_payload(entity, [queries.format_show(r) for r in past_rows], upcoming_shows)
+
+        detail_cache.set(kind, id, etag, payload, queries.first_start_time(upcoming_shows))
+
+    return conditional(render_template('pages/show_{}.html'.format(kind), **{kind: payload}), etag, last_modified)
+
+
+async def show_venue(venue_id):
+    return await _detail('venue', Venue, Show.venue_id, venue_id)
+
+
+async def show_artist(artist_id):
+    return await _detail('artist', Artist, Show.artist_id, artist_id)
+
+
+ASYNC_VIEWS = {
+    'venues.venues': venues,
+    'artists.artists': artists,
+    'shows.shows': shows,
+    'venues.search_venues': search_venues,
+    'artists.search_artists': search_artists,
+    'venues.show_venue': show_venue,
+    'artists.show_artist': show_artist,
+}
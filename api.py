@@ -0,0 +1,126 @@
+import json
+
+from flask import Blueprint, Response, abort, current_app, request
+
+import queries
+from models import Venue, Artist
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+VENUE_FIELDS = ('id', 'name', 'city', 'state', 'address', 'phone', 'image_link', 'facebook_link', 'website',
+                'seeking_talent', 'seeking_description', 'genres', 'latitude', 'longitude', 'upcoming_shows_count',
+                'past_shows_count')
+ARTIST_FIELDS = ('id', 'name', 'city', 'state', 'phone', 'image_link', 'facebook_link', 'website',
+                 'seeking_venue', 'seeking_description', 'genres', 'upcoming_shows_count', 'past_shows_count')
+SHOW_FIELDS = ('id', 'venue_id', 'artist_id', 'start_time', 'end_time', 'venue_name', 'artist_name',
+               'artist_image_link', 'venue_image_link')
+
+
+def json_response(data, status=200):
+    if orjson is not None:
+        body = orjson.dumps(data)
+    else:
+        body = json.dumps(data, separators=(',', ':'))
+    return Response(body, status=status, mimetype='application/json')
+
+
+def _fields(allowed):
+    '''
+    Parse the sparse fieldset from ?fields=a,b,c
+    '''
+    fields = request.args.get('fields')
+    if not fields:
+        return None
+
+    fields = [f for f in fields.split(',') if f]
+    if not fields or any(f not in allowed for f in fields):
+        abort(400)
+
+    return fields
+
+
+def _ids():
+    '''
+    Parse the batch of ids from ?ids=1,2,3
+    '''
+    ids = request.args.get('ids')
+    if ids is None:
+        return None
+
+    try:
+        ids = [int(i) for i in ids.split(',')]
+    except ValueError:
+        abort(400)
+
+    if len(ids) > current_app.config['API_MAX_IDS']:
+        abort(400)
+
+    return ids
+
+
+def _listing(fetch, allowed):
+    try:
+        data, next_cursor = fetch(
+            fields=_fields(allowed),
+            ids=_ids(),
+            cursor=request.args.get('after'),
+            limit=current_app.config['PAGE_SIZE']
+        )
+    except ValueError:
+        abort(400)
+
+    return json_response({'data': data, 'next': next_cursor})
+
+
+def _single(fetch, id, allowed):
+    data, _ = fetch(fields=_fields(allowed), ids=[id])
+
+    if not data:
+        abort(404)
+
+    return json_response({'data': data[0]})
+
+
+@api.route('/venues')
+def venues():
+    return _listing(lambda **kwargs: queries.entities(Venue, **kwargs), VENUE_FIELDS)
+
+
+@api.route('/venues/<int:venue_id>')
+def venue(venue_id):
+    return _single(lambda **kwargs: queries.entities(Venue, **kwargs), venue_id, VENUE_FIELDS)
+
+
+@api.route('/artists')
+def artists():
+    return _listing(lambda **kwargs: queries.entities(Artist, **kwargs), ARTIST_FIELDS)
+
+
+@api.route('/artists/<int:artist_id>')
+def artist(artist_id):
+    return _single(lambda **kwargs: queries.entities(Artist, **kwargs), artist_id, ARTIST_FIELDS)
+
+
+@api.route('/shows')
+def shows():
+    return _listing(queries.shows, SHOW_FIELDS)
+
+
+@api.route('/shows/<int:show_id>')
+def show(show_id):
+    return _single(queries.shows, show_id, SHOW_FIELDS)
+
+
+@api.errorhandler(400)
+def bad_request(error):
+    return json_response({'error': 400, 'message': 'bad request'}, 400)
+
+
+@api.errorhandler(404)
+def not_found(error):
+    return json_response({'error': 404, 'message': 'resource not found'}, 404)
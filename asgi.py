@@ -0,0 +1,157 @@
+'''
+ASGI entry point. The listing, search and detail pages of aio.ASYNC_VIEWS run as coroutines on
+the server's event loop with pooled async database connections, so a worker serves many of
+them at once while PostgreSQL works. The other routes run in the Flask app on a thread pool:
+
+  $ uvicorn --factory asgi:create_asgi_app --workers 4
+
+Requires SQLAlchemy 1.4 or later, asyncpg and an ASGI server such as uvicorn.
+'''
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import RequestRedirect
+
+from aio import ASYNC_VIEWS, async_db
+from app import create_app
+
+
+def _environ(scope, body):
+    '''
+    WSGI environ of an ASGI HTTP request whose body has been read
+    '''
+    script_name = scope.get('root_path', '')
+    path = scope['path'][len(script_name):] if scope['path'].startswith(script_name) else scope['path']
+    server = scope.get('server') or ('localhost', 80)
+
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': script_name.encode('utf8').decode('latin1'),
+        'PATH_INFO': path.encode('utf8').decode('latin1'),
+        'QUERY_STRING': scope['query_string'].decode('latin1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': 'HTTP/{}'.format(scope['http_version']),
+        'REMOTE_ADDR': (scope.get('client') or ('',))[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+
+    for name, value in scope['headers']:
+        name = name.decode('latin1').upper().replace('-', '_')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = 'HTTP_' + name
+        value = value.decode('latin1')
+        environ[name] = environ[name] + ',' + value if name in environ else value
+
+    return environ
+
+
+class AsgiApp:
+    '''
+    Serves a Flask app over ASGI: the endpoints of ASYNC_VIEWS are awaited on the event loop
+    with the app's request hooks and error handlers, everything else goes through the WSGI app
+    on a pool of ASGI_SYNC_THREADS threads.
+    '''
+
+    def __init__(self, app):
+        self.app = app
+        self.executor = ThreadPoolExecutor(app.config['ASGI_SYNC_THREADS'], thread_name_prefix='wsgi')
+        async_db.init_app(app)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            body = await self._read_body(receive)
+            environ = _environ(scope, body)
+            view, view_args = self._async_view(environ)
+            if view:
+                status, headers, content = await self._dispatch(environ, view, view_args)
+            else:
+                status, headers, content = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, self._call_wsgi, environ)
+            await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+            await send({'type': 'http.response.body', 'body': content})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await async_db.dispose(self.app)
+                self.executor.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    async def _read_body(receive):
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body'):
+                return b''.join(chunks)
+
+    def _async_view(self, environ):
+        try:
+            endpoint, view_args = self.app.url_map.bind_to_environ(environ).match()
+        except (HTTPException, RequestRedirect):
+            return None, None
+        return ASYNC_VIEWS.get(endpoint), view_args
+
+    async def _dispatch(self, environ, view, view_args):
+        '''
+        Flask's request handling (Flask.wsgi_app and full_dispatch_request) around an async view.
+        The request context is a context variable, so it stays with this task while it awaits.
+        '''
+        app = self.app
+        with app.request_context(environ):
+            try:
+                try:
+                    rv = app.preprocess_request()
+                    if rv is None:
+                        rv = await view(**view_args)
+                except Exception as e:
+                    rv = app.handle_user_exception(e)
+                response = app.finalize_request(rv)
+            except Exception as e:
+                response = app.handle_exception(e)
+
+            content = b'' if environ['REQUEST_METHOD'] == 'HEAD' else response.get_data()
+            return response.status_code, self._headers(response.headers.items()), content
+
+    def _call_wsgi(self, environ):
+        started = []
+
+        def start_response(status, headers, exc_info=None):
+            started[:] = [int(status.split(' ', 1)[0]), headers]
+
+        result = self.app(environ, start_response)
+        try:
+            content = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        status, headers = started
+        return status, self._headers(headers), content
+
+    @staticmethod
+    def _headers(headers):
+        return [(name.lower().encode('latin1'), value.encode('latin1')) for name, value in headers]
+
+
+def create_asgi_app(config='config', settings=None):
+    '''
+    The ASGI app of create_app(config, settings)
+    '''
+    return AsgiApp(create_app(config, settings))
@@ -0,0 +1,214 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+
+from flask import abort, current_app, request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+# Bundled outputs and their sources, relative to the static folder, in load order
+BUNDLES = {
+    'css/app.css': [
+        'css/bootstrap.min.css',
+        'css/layout.main.css',
+        'css/main.css',
+        'css/main.responsive.css',
+        'css/main.quickfix.css',
+    ],
+    'js/head.js': [
+        'js/libs/modernizr-2.8.2.min.js',
+        'js/libs/moment.min.js',
+    ],
+    'js/app.js': [
+        'js/libs/jquery-1.11.1.min.js',
+        'js/libs/bootstrap-3.1.1.min.js',
+        'js/plugins.js',
+        'js/script.js',
+    ],
+    'js/respond.js': [
+        'js/libs/respond-1.4.2.min.js',
+    ],
+}
+
+# Copied with a fingerprint so that the bundled stylesheets and the pages can reference them
+FINGERPRINTED_DIRS = ('fonts', 'img', 'ico')
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.eot', '.ttf', '.otf')
+
+CSS_URL = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+
+
+def _fingerprint(path, content):
+    root, ext = posixpath.splitext(path)
+    return '{}.{}{}'.format(root, hashlib.sha256(content).hexdigest()[:12], ext)
+
+
+def minify_css(css):
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    return css.replace(';}', '}').strip()
+
+
+def minify_js(js):
+    return rjsmin.jsmin(js) if rjsmin is not None else js
+
+
+def _rewrite_urls(css, source, output, manifest):
+    '''
+    Point the relative url()s of a source stylesheet at the fingerprinted files, relative to
+    the bundle's output path
+    '''
+    def replace(match):
+        url = match.group(2)
+        if re.match(r'^(?:[a-z]+:|/|#)', url):
+            return match.group(0)
+        path, suffix = re.match(r'^([^?#]*)(.*)$', url).groups()
+        target = posixpath.normpath(posixpath.join(posixpath.dirname(source), path))
+        if target not in manifest:
+            return match.group(0)
+        return 'url("{}{}")'.format(posixpath.relpath(manifest[target], posixpath.dirname(output)), suffix)
+
+    return CSS_URL.sub(replace, css)
+
+
+def _write(dist, path, content):
+    '''
+    Write a fingerprinted file with its precompressed variants
+    '''
+    filename = os.path.join(dist, path)
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with open(filename, 'wb') as f:
+        f.write(content)
+
+    if path.endswith(COMPRESSIBLE):
+        with open(filename + '.gz', 'wb') as f:
+            f.write(gzip.compress(content, compresslevel=9))
+        if brotli is not None:
+            with open(filename + '.br', 'wb') as f:
+                f.write(brotli.compress(content))
+
+
+def build(static_folder, dist_folder):
+    '''
+    Fingerprint, bundle, minify and precompress the static assets into dist_folder and
+    write its manifest.json, mapping logical asset paths to fingerprinted ones
+    '''
+    shutil.rmtree(dist_folder, ignore_errors=True)
+    manifest = {}
+
+    for directory in FINGERPRINTED_DIRS:
+        for root, _, files in os.walk(os.path.join(static_folder, directory)):
+            for name in files:
+                path = os.path.relpath(os.path.join(root, name), static_folder).replace(os.sep, '/')
+                with open(os.path.join(static_folder, path), 'rb') as f:
+                    content = f.read()
+                manifest[path] = _fingerprint(path, content)
+                _write(dist_folder, manifest[path], content)
+
+    for output, sources in BUNDLES.items():
+        parts = []
+        for source in sources:
+            with open(os.path.join(static_folder, source), encoding='utf-8') as f:
+                text = f.read()
+            if output.endswith('.css'):
+                parts.append(minify_css(_rewrite_urls(text, source, output, manifest)))
+            else:
+                parts.append(minify_js(text))
+        separator = '\n' if output.endswith('.css') else '\n;\n'
+        content = separator.join(parts).encode('utf-8')
+        manifest[output] = _fingerprint(output, content)
+        _write(dist_folder, manifest[output], content)
+
+    with open(os.path.join(dist_folder, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    return manifest
+
+
+class Assets:
+    '''
+    Serves the built assets under /assets with far-future immutable caching and their
+    precompressed variants, and provides the asset_urls() template helper. The build folder,
+    manifest and version of each app are kept in app.extensions['assets'].
+    '''
+
+    def init_app(self, app):
+        dist_folder = os.path.join(app.static_folder, 'dist')
+        manifest = {}
+
+        path = os.path.join(dist_folder, 'manifest.json')
+        if os.path.exists(path):
+            with open(path) as f:
+                manifest = json.load(f)
+
+        app.extensions['assets'] = {
+            'dist_folder': dist_folder,
+            'manifest': manifest,
+            # Changes whenever the assets are rebuilt, so that pages linking to them can be revalidated
+            'version': hashlib.sha1(json.dumps(manifest, sort_keys=True).encode()).hexdigest()[:12]
+        }
+
+        app.add_url_rule('/assets/<path:filename>', 'assets', self.serve)
+        app.jinja_env.globals['asset_urls'] = self.asset_urls
+
+    @property
+    def dist_folder(self):
+        return current_app.extensions['assets']['dist_folder']
+
+    @property
+    def manifest(self):
+        return current_app.extensions['assets']['manifest']
+
+    @property
+    def version(self):
+        return current_app.extensions['assets']['version']
+
+    def asset_urls(self, path):
+        '''
+        URLs to load an asset or bundle: the fingerprinted build when there is one,
+        otherwise the unbundled sources
+        '''
+        manifest = self.manifest
+        if path in manifest:
+            return [url_for('assets', filename=manifest[path])]
+        return [url_for('static', filename=source) for source in BUNDLES.get(path, [path])]
+
+    def serve(self, filename):
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        encoding = None
+
+        for name, suffix in (('br', '.br'), ('gzip', '.gz')):
+            # The quality is 0 for encodings the client did not list or refused with q=0
+            if request.accept_encodings[name] > 0 and os.path.isfile(os.path.join(self.dist_folder, filename + suffix)):
+                encoding = name
+                filename += suffix
+                break
+
+        if not os.path.isfile(os.path.join(self.dist_folder, filename)):
+            abort(404)
+
+        response = send_from_directory(self.dist_folder, filename, mimetype=mimetype,
+                                       max_age=current_app.config['ASSETS_MAX_AGE'])
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        response.vary.add('Accept-Encoding')
+        if encoding:
+            response.content_encoding = encoding
+        return response
+
+
+assets = Assets()
@@ -0,0 +1,175 @@
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from itertools import chain
+
+from flask import abort, current_app, jsonify, request
+
+from models import db, write_listeners, Venue, Artist
+
+_SEPARATORS = re.compile(r'[^0-9a-z]+')
+
+
+def normalize(text):
+    '''
+    Lower case, accents removed and punctuation collapsed to single spaces
+    '''
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+    return _SEPARATORS.sub(' ', text).strip()
+
+
+class _SortedKeys:
+    '''
+    Sorted array of keys with a parallel array of ids
+    '''
+
+    def __init__(self, entries):
+        entries = sorted(entries)
+        self.keys = [key for key, _ in entries]
+        self.ids = [id for _, id in entries]
+
+    def add(self, key, id):
+        i = bisect_left(self.keys, key)
+        self.keys.insert(i, key)
+        self.ids.insert(i, id)
+
+    def discard(self, key, id):
+        i = bisect_left(self.keys, key)
+        while i < len(self.keys) and self.keys[i] == key:
+            if self.ids[i] == id:
+                del self.keys[i]
+                del self.ids[i]
+                return
+            i += 1
+
+    def starting_with(self, prefix):
+        i = bisect_left(self.keys, prefix)
+        while i < len(self.keys) and self.keys[i].startswith(prefix):
+            yield self.ids[i]
+            i += 1
+
+
+def _word_keys(normalized):
+    # The name from its second, third... word onwards, so that later words match a prefix too
+    words = normalized.split(' ')
+    return {' '.join(words[i:]) for i in range(1, len(words))}
+
+
+class PrefixIndex:
+    '''
+    Normalized names in sorted arrays: one of whole names and one of the names from each later
+    word. A lookup is a binary search in each followed by a scan of at most limit matches
+    (plus duplicates), so it does not depend on the number of names.
+    '''
+
+    def __init__(self, names=()):
+        self.names = dict(names)
+        normalized = {id: normalize(name) for id, name in self.names.items()}
+        self.whole = _SortedKeys((key, id) for id, key in normalized.items())
+        self.words = _SortedKeys((key, id) for id, name in normalized.items() for key in _word_keys(name))
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.names)
+
+    def _remove(self, id):
+        normalized = normalize(self.names.pop(id))
+        self.whole.discard(normalized, id)
+        for key in _word_keys(normalized):
+            self.words.discard(key, id)
+
+    def put(self, id, name):
+        with self._lock:
+            if id in self.names:
+                self._remove(id)
+            self.names[id] = name
+            normalized = normalize(name)
+            self.whole.add(normalized, id)
+            for key in _word_keys(normalized):
+                self.words.add(key, id)
+
+    def remove(self, id):
+        with self._lock:
+            if id in self.names:
+                self._remove(id)
+
+    def search(self, prefix, limit=10):
+        '''
+        Up to limit (id, name) pairs whose name, or a later word of it, starts with the prefix.
+        Names starting with the prefix come first, in alphabetical order.
+        '''
+        prefix = normalize(prefix)
+        if not prefix or limit <= 0:
+            return []
+
+        with self._lock:
+            ids = []
+            for id in chain(self.whole.starting_with(prefix), self.words.starting_with(prefix)):
+                if id not in ids:
+                    ids.append(id)
+                    if len(ids) == limit:
+                        break
+            return [(id, self.names[id]) for id in ids]
+
+
+class Autocomplete:
+    '''
+    In-process prefix indexes of the venue and artist names behind /autocomplete, loaded on first
+    use and kept up to date by the model writes of this process. Writes made by other processes
+    are picked up by reloading the indexes once they are AUTOCOMPLETE_MAX_AGE seconds old.
+    Each app has its own indexes, in app.extensions['autocomplete'].
+    '''
+
+    MODELS = {'venue': Venue, 'artist': Artist}
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.extensions['autocomplete'] = {'indexes': {}, 'loaded_at': {}}
+        app.add_url_rule('/autocomplete', 'autocomplete', self.view)
+        if self._on_write not in write_listeners:
+            write_listeners.append(self._on_write)
+
+    @property
+    def indexes(self):
+        return current_app.extensions['autocomplete']['indexes']
+
+    def index(self, kind):
+        state = current_app.extensions['autocomplete']
+        indexes, loaded_at = state['indexes'], state['loaded_at']
+        index = indexes.get(kind)
+        if index is None or time.time() - loaded_at[kind] > current_app.config['AUTOCOMPLETE_MAX_AGE']:
+            with self._lock:
+                if indexes.get(kind) is index:
+                    model = self.MODELS[kind]
+                    indexes[kind] = PrefixIndex(db.session.query(model.id, model.name))
+                    loaded_at[kind] = time.time()
+                index = indexes[kind]
+        return index
+
+    def view(self):
+        kind = request.args.get('type', '')
+        if kind not in self.MODELS:
+            abort(400)
+
+        limit = min(request.args.get('limit', 10, type=int), current_app.config['AUTOCOMPLETE_MAX_RESULTS'])
+        matches = self.index(kind).search(request.args.get('q', ''), limit)
+
+        return jsonify([{'id': id, 'name': name} for id, name in matches])
+
+    def _on_write(self, instance, keys):
+        for kind, model in self.MODELS.items():
+            index = self.indexes.get(kind)
+            if index is None or not isinstance(instance, model):
+                continue
+            if instance in db.session:
+                index.put(instance.id, instance.name)
+            else:
+                index.remove(instance.id)
+
+
+autocomplete = Autocomplete()
@@ -0,0 +1,51 @@
+'''
+Micro-benchmark of the `datetime` Jinja filter against the previous parse-and-format implementation.
+
+  $ python -m benchmarks.bench_datetime_filter
+'''
+import argparse
+import random
+import timeit
+from datetime import datetime, timedelta
+
+import babel.dates
+import dateutil.parser
+
+from filters import format_datetime
+
+
+def legacy_format_datetime(value, format='medium'):
+    date = dateutil.parser.parse(value)
+    if format == 'full':
+        format = "EEEE MMMM, d, y 'at' h:mma"
+    elif format == 'medium':
+        format = "EE MM, dd, y h:mma"
+    return babel.dates.format_datetime(date, format, locale='en')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--values', type=int, default=500, help='distinct show times on the page')
+    parser.add_argument('--number', type=int, default=20, help='page renders per measurement')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    start = datetime(2020, 1, 1)
+    times = [start + timedelta(minutes=rng.randint(0, 525600)) for _ in range(args.values)]
+    strings = [t.strftime('%Y-%m-%d %H:%M:%S') for t in times]
+
+    assert all(format_datetime(s, 'full') == legacy_format_datetime(s, 'full') for s in strings)
+
+    cases = (
+        ('legacy (str)', lambda: [legacy_format_datetime(s, 'full') for s in strings]),
+        ('cached (str)', lambda: [format_datetime(s, 'full') for s in strings]),
+        ('cached (datetime)', lambda: [format_datetime(t, 'full') for t in times]),
+    )
+
+    for label, fn in cases:
+        seconds = min(timeit.repeat(fn, number=args.number, repeat=5)) / (args.number * args.values)
+        print('{:<18} {:8.2f} us per value'.format(label, seconds * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+'''
+Drive every route through the Flask test client against a seeded database and report latency
+percentiles, SQL statements per request and peak Python memory per route.
+
+  $ python -m benchmarks.dataset --venues 10000 --artists 50000 --shows 1000000
+  $ python -m benchmarks.bench_routes --requests 200 --output results/$(git rev-parse --short HEAD).json
+
+Routes that write (create and edit submissions) only run with --writes.
+'''
+import argparse
+import json
+import random
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from models import db, Venue, Artist
+
+READ_ROUTES = [
+    ('index', 'GET', lambda s: '/', None),
+    ('venues', 'GET', lambda s: '/venues', None),
+    ('venues_filtered', 'GET', lambda s: '/venues?genre=Jazz&state=NY', None),
+    ('venues_near', 'GET', lambda s: '/venues/near?lat=40.71&lon=-74.01&radius=25', None),
+    ('artists', 'GET', lambda s: '/artists', None),
+    ('shows', 'GET', lambda s: '/shows', None),
+    ('shows_filtered', 'GET', lambda s: '/shows?from={}&to={}&state=NY'.format(*s.month()), None),
+    ('shows_calendar', 'GET', lambda s: '/shows/calendar', None),
+    ('show_venue', 'GET', lambda s: '/venues/{}'.format(s.venue()), None),
+    ('show_artist', 'GET', lambda s: '/artists/{}'.format(s.artist()), None),
+    ('venue_availability', 'GET', lambda s: '/venues/{}/availability'.format(s.venue()), None),
+    ('search_venues', 'POST', lambda s: '/venues/search', lambda s: {'search_term': s.term()}),
+    ('search_artists', 'POST', lambda s: '/artists/search', lambda s: {'search_term': s.term()}),
+    ('autocomplete', 'GET', lambda s: '/autocomplete?type=artist&q={}'.format(s.term()), None),
+    ('create_venue_form', 'GET', lambda s: '/venues/create', None),
+    ('create_artist_form', 'GET', lambda s: '/artists/create', None),
+    ('create_shows', 'GET', lambda s: '/shows/create', None),
+    ('edit_venue', 'GET', lambda s: '/venues/{}/edit'.format(s.venue()), None),
+    ('edit_artist', 'GET', lambda s: '/artists/{}/edit'.format(s.artist()), None),
+    ('api.venues', 'GET', lambda s: '/api/v1/venues?fields=id,name,city', None),
+    ('api.venues_batch', 'GET', lambda s: '/api/v1/venues?ids={}'.format(','.join(str(s.venue()) for _ in range(20))), None),
+    ('api.artists', 'GET', lambda s: '/api/v1/artists', None),
+    ('api.shows', 'GET', lambda s: '/api/v1/shows', None),
+]
+
+VENUE_FORM = {
+    'name': 'Benchmark Hall', 'city': 'Austin', 'state': 'TX', 'address': '1 Main St', 'phone': '512-555-0100',
+    'image_link': 'https://images.example.com/venue.jpg', 'genres': ['Jazz'], 'facebook_link': 'https://www.facebook.com/x',
+    'website': 'https://www.example.com', 'seeking_description': ''
+}
+ARTIST_FORM = dict(VENUE_FORM, name='Benchmark Band')
+del ARTIST_FORM['address']
+
+WRITE_ROUTES = [
+    ('create_venue_submission', 'POST', lambda s: '/venues/create', lambda s: VENUE_FORM),
+    ('create_artist_submission', 'POST', lambda s: '/artists/create', lambda s: ARTIST_FORM),
+    ('create_show_submission', 'POST', lambda s: '/shows/create', lambda s: {
+        'venue_id': s.venue(), 'artist_id': s.artist(),
+        'start_time': (datetime.now() + timedelta(days=s.rng.randint(1, 365))).strftime('%Y-%m-%d %H:%M:%S')}),
+    ('edit_venue_submission', 'POST', lambda s: '/venues/{}/edit'.format(s.venue()), lambda s: VENUE_FORM),
+    ('edit_artist_submission', 'POST', lambda s: '/artists/{}/edit'.format(s.artist()), lambda s: ARTIST_FORM),
+]
+
+TERMS = ['ba', 'lomi', 'zen', 'jazz', 'new york', 'quimar', 'tu', 'rock']
+
+
+class Sample:
+    '''
+    Random ids and search terms drawn from the seeded dataset
+    '''
+
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.venue_ids = [r.id for r in db.session.query(Venue.id).order_by(db.func.random()).limit(1000)]
+        self.artist_ids = [r.id for r in db.session.query(Artist.id).order_by(db.func.random()).limit(1000)]
+        db.session.remove()
+
+    def venue(self):
+        return self.rng.choice(self.venue_ids)
+
+    def artist(self):
+        return self.rng.choice(self.artist_ids)
+
+    def term(self):
+        return self.rng.choice(TERMS)
+
+    def month(self):
+        '''
+        from and to dates of a 30 day window starting in the next year
+        '''
+        start = datetime.now().date() + timedelta(days=self.rng.randint(0, 365))
+        return start.isoformat(), (start + timedelta(days=30)).isoformat()
+
+
+def _percentile(sorted_values, p):
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _run(app, client, sample, route, requests):
+    name, method, url, data = route
+    statements = []
+    engine = db.get_engine(app)
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    timings = []
+    statement_counts = []
+    statuses = set()
+
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        for _ in range(requests):
+            del statements[:]
+            args = (url(sample), method, data(sample) if data else None)
+            start = time.perf_counter()
+            response = client.open(args[0], method=args[1], data=args[2])
+            timings.append((time.perf_counter() - start) * 1000)
+            statement_counts.append(len(statements))
+            statuses.add(response.status_code)
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+
+    tracemalloc.start()
+    client.open(url(sample), method=method, data=data(sample) if data else None)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'route': name,
+        'method': method,
+        'requests': requests,
+        'status': sorted(statuses),
+        'p50_ms': _percentile(timings, 50),
+        'p95_ms': _percentile(timings, 95),
+        'p99_ms': _percentile(timings, 99),
+        'statements_mean': sum(statement_counts) / len(statement_counts),
+        'statements_max': max(statement_counts),
+        'peak_memory_kb': peak / 1024
+    }
+
+
+def _revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=100, help='requests per route')
+    parser.add_argument('--routes', help='comma separated route names to run (default: all)')
+    parser.add_argument('--writes', action='store_true', help='also run the create and edit submissions')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    args = parser.parse_args()
+
+    from app import create_app
+    app = create_app()
+
+    app.config['WTF_CSRF_ENABLED'] = False
+    # Every statement runs on the primary engine, whose statements are counted
+    app.config['REPLICA_BINDS'] = []
+
+    routes = READ_ROUTES + (WRITE_ROUTES if args.writes else [])
+    if args.routes:
+        selected = set(args.routes.split(','))
+        routes = [r for r in routes if r[0] in selected]
+
+    with app.app_context():
+        sample = Sample(args.seed)
+
+    client = app.test_client()
+    results = []
+
+    print('{:<26} {:>9} {:>9} {:>9} {:>10} {:>11}'.format('route', 'p50 ms', 'p95 ms', 'p99 ms', 'statements', 'peak KiB'))
+    for route in routes:
+        result = _run(app, client, sample, route, args.requests)
+        results.append(result)
+        print('{route:<26} {p50_ms:9.2f} {p95_ms:9.2f} {p99_ms:9.2f} {statements_mean:10.1f} {peak_memory_kb:11.0f}'.format(**result))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'revision': _revision(),
+                'timestamp': datetime.now().isoformat(),
+                'requests_per_route': args.requests,
+                'results': results
+            }, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+'''
+Compare the ranked search against the previous ILIKE-per-row implementation.
+
+  $ python -m benchmarks.dataset --venues 100000 --artists 100000 --shows 1000000
+  $ python -m benchmarks.bench_search
+'''
+import argparse
+import statistics
+import time
+from datetime import datetime
+
+import search
+from models import Venue, Show
+
+TERMS = ['ba', 'lomi', 'zen', 'jazz', 'new york', 'quimar', 'tu', 'rock']
+
+
+def legacy_search_venues(term, current_time):
+    result = Venue.query.filter(Venue.name.ilike('%{}%'.format(term))).all()
+    return {
+        'count': len(result),
+        'data': [{
+            'id': v.id,
+            'name': v.name,
+            'num_upcoming_shows': len(v.shows.filter(Show.start_time > current_time).all())
+        } for v in result]
+    }
+
+
+def ranked_search_venues(term, current_time):
+    return search.search_venues(term, 50)
+
+
+def _measure(fn, repeat):
+    current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    timings = []
+    for _ in range(repeat):
+        for term in TERMS:
+            start = time.perf_counter()
+            fn(term, current_time)
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    from app import create_app
+    app = create_app()
+
+    with app.app_context():
+        for label, fn in (('ilike', legacy_search_venues), ('ranked', ranked_search_venues)):
+            timings = sorted(_measure(fn, args.repeat))
+            print('{:<8} median {:8.2f} ms   p95 {:8.2f} ms'.format(
+                label, statistics.median(timings), timings[int(len(timings) * 0.95) - 1]))
+
+
+if __name__ == '__main__':
+    main()
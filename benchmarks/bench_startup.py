@@ -0,0 +1,94 @@
+'''
+Cold start of a worker: time to import the app module and to run create_app(), and the import time
+of each module, from fresh interpreters running with -X importtime. Needs no database.
+
+  $ python -m benchmarks.bench_startup --repeat 5 --top 30
+'''
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that creating the app should not import: they are imported by the routes and commands
+# that use them
+DEFERRED = ('babel', 'dateutil', 'wtforms', 'flask_wtf', 'forms', 'importer', 'flask_migrate', 'alembic')
+
+STARTUP = '''
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+created = time.perf_counter()
+print(json.dumps({'import': imported - start, 'create_app': created - imported, 'modules': sorted(sys.modules)}))
+'''
+
+
+def parse_importtime(output):
+    '''
+    (module, self us, cumulative us, depth) for each line of -X importtime output, where depth is
+    0 for the modules imported directly by the measured code
+    '''
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return modules
+
+
+def _run():
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', STARTUP], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.splitlines()[-1]), parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='interpreters started (medians are reported)')
+    parser.add_argument('--top', type=int, default=30, help='modules listed, slowest cumulative import first')
+    parser.add_argument('--depth', type=int, help='only list modules imported at most this deep (0: by the app)')
+    args = parser.parse_args()
+
+    timings = defaultdict(list)
+    self_us = defaultdict(list)
+    cumulative_us = defaultdict(list)
+    depths = {}
+    loaded = set()
+
+    for _ in range(args.repeat):
+        result, modules = _run()
+        timings['import app'].append(result['import'])
+        timings['create_app()'].append(result['create_app'])
+        loaded.update(result['modules'])
+        for name, own, cumulative, depth in modules:
+            self_us[name].append(own)
+            cumulative_us[name].append(cumulative)
+            depths.setdefault(name, depth)
+
+    for label, values in timings.items():
+        print('{:<14} {:8.1f} ms'.format(label, statistics.median(values) * 1000))
+
+    names = [name for name in cumulative_us if args.depth is None or depths[name] <= args.depth]
+    names.sort(key=lambda name: statistics.median(cumulative_us[name]), reverse=True)
+
+    print()
+    print('{:<48} {:>10} {:>14}'.format('module', 'self ms', 'cumulative ms'))
+    for name in names[:args.top]:
+        print('{:<48} {:10.2f} {:14.2f}'.format('  ' * depths[name] + name, statistics.median(self_us[name]) / 1000,
+                                                statistics.median(cumulative_us[name]) / 1000))
+
+    imported = [name for name in DEFERRED if name in loaded]
+    print()
+    print('Deferred modules imported at start up: {}'.format(', '.join(imported) or 'none'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+'''
+Render time of a 500 tile shows page with and without the {% cache %} fragment cache, and the
+cold load time of its templates with and without the bytecode cache. Needs no database.
+
+  $ python -m benchmarks.bench_templates --tiles 500
+'''
+import argparse
+import random
+import tempfile
+import timeit
+from datetime import datetime, timedelta
+
+from jinja2 import FileSystemBytecodeCache
+
+from cache import LRUCache
+from templating import FragmentCacheExtension
+
+TEMPLATES = ('pages/shows.html', 'layouts/main.html')
+
+
+def _shows(count):
+    rng = random.Random(0)
+    start = datetime(2020, 1, 1)
+    return [{
+        'id': i,
+        'venue_id': rng.randint(1, 1000),
+        'artist_id': rng.randint(1, 5000),
+        'start_time': (start + timedelta(minutes=rng.randint(0, 525600))).strftime('%Y-%m-%d %H:%M:%S'),
+        'venue_name': 'Venue {}'.format(i),
+        'artist_name': 'Artist {}'.format(i),
+        'artist_image_link': 'https://images.example.com/artist.jpg',
+        'venue_image_link': 'https://images.example.com/venue.jpg',
+        'version': 1,
+        'venue_version': 1,
+        'artist_version': 1
+    } for i in range(count)]
+
+
+def _load_seconds(app, bytecode_cache):
+    '''
+    Time for a fresh environment, as in a new worker, to load the page's templates. The filters
+    and globals the app registers (e.g. datetime, asset_urls) are copied into it, since compiling
+    a template checks that its filters exist.
+    '''
+    def load():
+        env = app.create_jinja_environment()
+        env.bytecode_cache = bytecode_cache
+        env.add_extension(FragmentCacheExtension)
+        env.filters.update(app.jinja_env.filters)
+        env.globals.update(app.jinja_env.globals)
+        for name in TEMPLATES:
+            env.get_template(name)
+
+    load()
+    return min(timeit.repeat(load, number=1, repeat=5))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tiles', type=int, default=500, help='show tiles on the page')
+    parser.add_argument('--number', type=int, default=20, help='page renders per measurement')
+    args = parser.parse_args()
+
+    from flask import render_template
+    from app import create_app
+    app = create_app()
+
+    env = app.jinja_env
+    shows = _shows(args.tiles)
+
+    def render():
+        return render_template('pages/shows.html', shows=shows, next_cursor=None, filters={}, states=[])
+
+    def render_cold():
+        env.fragment_cache = LRUCache(args.tiles)
+        return render()
+
+    with app.test_request_context('/shows'):
+        env.fragment_cache = None
+        expected = render()
+        env.fragment_cache = LRUCache(args.tiles)
+        assert render() == expected and render() == expected
+
+        cases = (
+            ('no fragment cache', None, render),
+            ('fragment cache, cold', None, render_cold),
+            ('fragment cache, warm', LRUCache(args.tiles), render),
+        )
+        for label, cache, fn in cases:
+            env.fragment_cache = cache
+            fn()
+            seconds = min(timeit.repeat(fn, number=args.number, repeat=5)) / args.number
+            print('{:<22} {:8.2f} ms per page'.format(label, seconds * 1000))
+
+    with tempfile.TemporaryDirectory() as directory:
+        for label, bytecode_cache in (('no bytecode cache', None),
+                                      ('bytecode cache', FileSystemBytecodeCache(directory))):
+            print('{:<22} {:8.2f} ms to load {}'.format(label, _load_seconds(app, bytecode_cache) * 1000,
+                                                       ', '.join(TEMPLATES)))
+
+
+if __name__ == '__main__':
+    main()
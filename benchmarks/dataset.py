@@ -0,0 +1,142 @@
+'''
+Seeded generator for a synthetic Venue/Artist/Show dataset.
+
+  $ python -m benchmarks.dataset --venues 10000 --artists 50000 --shows 1000000
+'''
+import argparse
+import random
+from datetime import datetime, timedelta
+
+from choices import state_choices, genres_choices
+from counters import rebuild_show_counters
+from models import db, Venue, Artist, Show
+
+BATCH_SIZE = 5000
+
+SYLLABLES = ['ba', 'lo', 'mi', 'ra', 'zen', 'ko', 'tu', 'vel', 'shi', 'dor', 'an', 'qui', 'mar', 'jo']
+CITY_LOCATIONS = {
+    'San Francisco': (37.77, -122.42), 'New York': (40.71, -74.01), 'Austin': (30.27, -97.74),
+    'Chicago': (41.88, -87.63), 'Seattle': (47.61, -122.33), 'Denver': (39.74, -104.99),
+    'Nashville': (36.16, -86.78), 'Boston': (42.36, -71.06), 'Portland': (45.52, -122.68),
+    'Atlanta': (33.75, -84.39), 'Miami': (25.76, -80.19), 'Detroit': (42.33, -83.05),
+    'Phoenix': (33.45, -112.07), 'Memphis': (35.15, -90.05), 'New Orleans': (29.95, -90.07),
+    'Oakland': (37.80, -122.27)
+}
+CITIES = list(CITY_LOCATIONS)
+STATES = [value for _, value in state_choices]
+GENRES = [value for _, value in genres_choices]
+
+
+def _name(rng):
+    return ' '.join(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).title()
+                    for _ in range(rng.randint(1, 3)))
+
+
+def _batched(rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert(table, rows):
+    for batch in _batched(rows):
+        db.session.execute(table.insert(), batch)
+    db.session.commit()
+
+
+def _venues(rng, count):
+    for _ in range(count):
+        city = rng.choice(CITIES)
+        latitude, longitude = CITY_LOCATIONS[city]
+        yield {
+            'name': _name(rng),
+            'city': city,
+            'latitude': latitude + rng.uniform(-0.3, 0.3),
+            'longitude': longitude + rng.uniform(-0.3, 0.3),
+            'state': rng.choice(STATES),
+            'address': '{} {} St'.format(rng.randint(1, 9999), _name(rng)),
+            'phone': '{:03d}-{:03d}-{:04d}'.format(rng.randint(100, 999), rng.randint(100, 999), rng.randint(0, 9999)),
+            'image_link': 'https://images.example.com/venue.jpg',
+            'facebook_link': 'https://www.facebook.com/venue',
+            'website': 'https://www.example.com',
+            'seeking_talent': rng.random() < 0.5,
+            'seeking_description': None,
+            'genres': rng.sample(GENRES, rng.randint(1, 3))
+        }
+
+
+def _artists(rng, count):
+    for _ in range(count):
+        yield {
+            'name': _name(rng),
+            'city': rng.choice(CITIES),
+            'state': rng.choice(STATES),
+            'phone': '{:03d}-{:03d}-{:04d}'.format(rng.randint(100, 999), rng.randint(100, 999), rng.randint(0, 9999)),
+            'image_link': 'https://images.example.com/artist.jpg',
+            'facebook_link': 'https://www.facebook.com/artist',
+            'website': 'https://www.example.com',
+            'seeking_venue': rng.random() < 0.5,
+            'seeking_description': None,
+            'genres': rng.sample(GENRES, rng.randint(1, 3))
+        }
+
+
+def _shows(rng, count, venue_ids, artist_ids):
+    # Two hour slots, each booked at most once per venue to satisfy the double booking constraint
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+    booked = set()
+    while len(booked) < count:
+        venue_id, slot = rng.choice(venue_ids), rng.randint(-12 * 730, 12 * 365)
+        if (venue_id, slot) in booked:
+            continue
+        booked.add((venue_id, slot))
+        start_time = now + timedelta(hours=2 * slot)
+        yield {
+            'venue_id': venue_id,
+            'artist_id': rng.choice(artist_ids),
+            'start_time': start_time,
+            'end_time': start_time + timedelta(hours=2)
+        }
+
+
+def generate(venues, artists, shows, seed=0):
+    '''
+    Fill the Venue, Artist and Show tables with a reproducible dataset of the given size.
+    '''
+    rng = random.Random(seed)
+
+    _insert(Venue.__table__, _venues(rng, venues))
+    _insert(Artist.__table__, _artists(rng, artists))
+
+    venue_ids = [r.id for r in db.session.query(Venue.id)]
+    artist_ids = [r.id for r in db.session.query(Artist.id)]
+
+    _insert(Show.__table__, _shows(rng, shows, venue_ids, artist_ids))
+
+    rebuild_show_counters()
+    db.session.execute('ANALYZE')
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--venues', type=int, default=10000)
+    parser.add_argument('--artists', type=int, default=50000)
+    parser.add_argument('--shows', type=int, default=1000000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    from app import create_app
+    app = create_app()
+
+    with app.app_context():
+        generate(args.venues, args.artists, args.shows, args.seed)
+
+
+if __name__ == '__main__':
+    main()
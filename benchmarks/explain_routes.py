@@ -0,0 +1,96 @@
+'''
+Run EXPLAIN on every statement the routes issue and fail if any of them scans the Show table
+sequentially. Run against a seeded database so the planner sees realistic table sizes:
+
+  $ python -m benchmarks.dataset --venues 10000 --artists 50000 --shows 1000000
+  $ python -m benchmarks.explain_routes
+'''
+import argparse
+import sys
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+from sqlalchemy import event
+
+from models import db, Venue, Artist, Show
+
+
+def _routes():
+    venue_id = db.session.query(Venue.id).order_by(Venue.id.desc()).limit(1).scalar()
+    artist_id = db.session.query(Artist.id).order_by(Artist.id.desc()).limit(1).scalar()
+    show_id = db.session.query(Show.id).order_by(Show.id.desc()).limit(1).scalar()
+    city, state = db.session.query(Venue.city, Venue.state).filter(Venue.id == venue_id).one()
+    start = datetime.now().date()
+    period = {'from': start.isoformat(), 'to': (start + timedelta(days=30)).isoformat()}
+
+    return [
+        ('GET', '/venues', None),
+        ('GET', '/artists', None),
+        ('GET', '/shows', None),
+        ('GET', '/shows?' + urlencode(dict(period, state=state, city=city)), None),
+        ('GET', '/venues/{}'.format(venue_id), None),
+        ('GET', '/venues/{}/availability?{}'.format(venue_id, urlencode(period)), None),
+        ('GET', '/artists/{}'.format(artist_id), None),
+        ('POST', '/venues/search', {'search_term': 'ba'}),
+        ('POST', '/artists/search', {'search_term': 'ba'}),
+        ('GET', '/api/v1/venues?ids={}'.format(venue_id), None),
+        ('GET', '/api/v1/artists?ids={}'.format(artist_id), None),
+        ('GET', '/api/v1/shows?ids={}'.format(show_id), None),
+    ]
+
+
+def _capture(app, method, url, data):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    engine = db.get_engine(app)
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        app.test_client().open(url, method=method, data=data)
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+    return statements
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--verbose', action='store_true', help='print every plan')
+    args = parser.parse_args()
+
+    from app import create_app
+    app = create_app()
+
+    app.config['WTF_CSRF_ENABLED'] = False
+    app.config['REPLICA_BINDS'] = []
+    failures = 0
+
+    with app.app_context():
+        db.session.execute('ANALYZE')
+        routes = _routes()
+        db.session.remove()
+
+        for method, url, data in routes:
+            for statement, parameters in _capture(app, method, url, data):
+                connection = db.engine.raw_connection()
+                try:
+                    cursor = connection.cursor()
+                    cursor.execute('EXPLAIN ' + statement, parameters)
+                    plan = '\n'.join(row[0] for row in cursor.fetchall())
+                finally:
+                    connection.close()
+
+                seq_scan = 'Seq Scan on "Show"' in plan
+                failures += seq_scan
+                print('{:<5} {} {:<40} {}'.format('FAIL' if seq_scan else 'ok', method, url, ' '.join(statement.split())[:80]))
+                if seq_scan or args.verbose:
+                    print(plan)
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
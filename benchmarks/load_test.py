@@ -0,0 +1,85 @@
+'''
+Measure throughput of a running server with many concurrent clients over the listing, search and
+detail pages. Detail pages pick random ids up to --venues and --artists, as seeded by
+benchmarks.dataset:
+
+  $ gunicorn -c gunicorn.conf.py -w 4 --threads 50 'app:create_app()' &
+  $ python -m benchmarks.load_test http://localhost:8000 --clients 200 --duration 30
+
+The async mode of asgi.py is measured the same way:
+
+  $ uvicorn --factory asgi:create_asgi_app --workers 4 --port 8000 &
+'''
+import argparse
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+PATHS = [
+    ('GET', lambda rng, args: '/venues', None),
+    ('GET', lambda rng, args: '/artists', None),
+    ('GET', lambda rng, args: '/shows', None),
+    ('GET', lambda rng, args: '/venues/{}'.format(rng.randint(1, args.venues)), None),
+    ('GET', lambda rng, args: '/artists/{}'.format(rng.randint(1, args.artists)), None),
+    ('POST', lambda rng, args: '/venues/search', {'search_term': 'ba'}),
+    ('POST', lambda rng, args: '/artists/search', {'search_term': 'zen'}),
+]
+
+
+def _client(base_url, args, seed, deadline, results, lock):
+    rng = random.Random(seed)
+    latencies = []
+    errors = 0
+    i = 0
+    while time.perf_counter() < deadline:
+        method, path, form = PATHS[i % len(PATHS)]
+        path = path(rng, args)
+        i += 1
+        data = urllib.parse.urlencode(form).encode() if form else None
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(urllib.request.Request(base_url + path, data=data, method=method)) as response:
+                response.read()
+        except (urllib.error.URLError, OSError):
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+
+    with lock:
+        results['latencies'].extend(latencies)
+        results['errors'] += errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('base_url')
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=30, help='seconds')
+    parser.add_argument('--venues', type=int, default=10000, help='largest venue id requested')
+    parser.add_argument('--artists', type=int, default=50000, help='largest artist id requested')
+    args = parser.parse_args()
+
+    results = {'latencies': [], 'errors': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+
+    with ThreadPoolExecutor(max_workers=args.clients) as executor:
+        for seed in range(args.clients):
+            executor.submit(_client, args.base_url.rstrip('/'), args, seed, deadline, results, lock)
+
+    latencies = sorted(results['latencies'])
+    if not latencies:
+        print('No successful requests ({} errors)'.format(results['errors']))
+        return
+
+    print('{} requests in {:.0f}s: {:.1f} req/s, p50 {:.1f} ms, p95 {:.1f} ms, {} errors'.format(
+        len(latencies), args.duration, len(latencies) / args.duration,
+        latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.95)] * 1000, results['errors']))
+
+
+if __name__ == '__main__':
+    main()
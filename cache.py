@@ -0,0 +1,141 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+class LRUCache:
+    '''
+    In-process cache bounded to max_size entries, evicting the least recently used
+    '''
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires_at=None):
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisCache:
+    '''
+    Cache shared between worker processes. Size is bounded by the server's maxmemory setting,
+    which should use the allkeys-lru eviction policy.
+    '''
+
+    def __init__(self, url, prefix='fyyur:'):
+        if redis is None:
+            raise RuntimeError('The redis package is required to use a shared cache')
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        data = self.client.get(self.prefix + key)
+        return pickle.loads(data) if data is not None else None
+
+    def set(self, key, value, expires_at=None):
+        ttl = None
+        if expires_at is not None:
+            ttl = int((expires_at - time.time()) * 1000)
+            if ttl <= 0:
+                return
+        self.client.set(self.prefix + key, pickle.dumps(value), px=ttl)
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*[self.prefix + key for key in keys])
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(key)
+
+
+class DetailCache:
+    '''
+    Read-through cache of the venue and artist detail payloads, keyed by the validator (ETag)
+    of the page. Any write a payload depends on changes the validator, so a stale payload is
+    never read again, whichever worker or replica it was loaded from, and needs no
+    invalidation; it ages out of the LRU. Each app has its own backend, in
+    app.extensions['detail_cache'].
+    '''
+
+    def __init__(self):
+        # Callables invoked as listener(kind, hit) on every lookup
+        self.lookup_listeners = []
+
+    def init_app(self, app):
+        url = app.config.get('DETAIL_CACHE_REDIS_URL')
+        if url:
+            app.extensions['detail_cache'] = RedisCache(url)
+        else:
+            app.extensions['detail_cache'] = LRUCache(app.config.get('DETAIL_CACHE_SIZE', 1024))
+
+    @property
+    def backend(self):
+        return current_app.extensions.get('detail_cache')
+
+    @staticmethod
+    def _key(kind, id, validator):
+        return '{}:{}:{}'.format(kind, id, validator)
+
+    def get(self, kind, id, validator):
+        backend = self.backend
+        if backend is None:
+            return None
+        payload = backend.get(self._key(kind, id, validator))
+        for listener in self.lookup_listeners:
+            listener(kind, payload is not None)
+        return payload
+
+    def set(self, kind, id, validator, payload, expires_at=None):
+        '''
+        Store a payload loaded after its validator, optionally until expires_at (a datetime),
+        e.g. when its first upcoming show starts and would move to the past shows
+        '''
+        backend = self.backend
+        if backend is None:
+            return
+        if expires_at is not None:
+            expires_at = time.mktime(expires_at.timetuple())
+        backend.set(self._key(kind, id, validator), payload, expires_at)
+
+    def clear(self):
+        backend = self.backend
+        if backend is not None:
+            backend.clear()
+
+
+detail_cache = DetailCache()
@@ -0,0 +1,57 @@
+import hashlib
+from datetime import timezone
+
+from flask import current_app, get_flashed_messages, make_response, request, session
+
+from assets import assets
+
+
+def make_etag(*parts):
+    '''
+    Strong entity tag for a page rendered from the given parts (versions, timestamps or data),
+    which also changes when the static assets the page links to are rebuilt
+    '''
+    return hashlib.sha1(repr((assets.version,) + parts).encode()).hexdigest()
+
+
+def _utc(value):
+    return value.replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def not_modified(etag, last_modified=None):
+    '''
+    A 304 response if the request's If-None-Match or If-Modified-Since validators still match,
+    otherwise None. Pages carrying flashed messages are always rendered.
+    '''
+    if '_flashes' in session:
+        return None
+
+    if request.if_none_match:
+        fresh = request.if_none_match.contains(etag)
+    elif last_modified and request.if_modified_since:
+        fresh = _utc(last_modified) <= request.if_modified_since.replace(tzinfo=timezone.utc)
+    else:
+        fresh = False
+
+    if not fresh:
+        return None
+
+    return conditional(current_app.response_class(status=304), etag, last_modified)
+
+
+def conditional(response, etag, last_modified=None):
+    '''
+    Attach the validators to a response and have clients revalidate it on every use. Pages
+    showing flashed messages get no validators and are not stored, since the messages are shown
+    only once and a later 304 would bring them back from the client's cache.
+    '''
+    response = make_response(response)
+    if get_flashed_messages():
+        response.cache_control.no_store = True
+        return response
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = _utc(last_modified)
+    response.cache_control.no_cache = True
+    response.cache_control.private = True
+    return response
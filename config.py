@@ -15,4 +15,97 @@ HOST = "localhost"
 PORT = 5432
 
 SQLALCHEMY_DATABASE_URI = f'{SCHEME}://{USER}:{PASSWORD}@{HOST}:{PORT}/{DATABASE_NAME}'
-SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+# Read replicas (comma separated URIs) serving GET requests, and how long a client's reads stay
+# on the primary after it writes, so that it sees its own changes
+SQLALCHEMY_REPLICA_URIS = [uri for uri in os.environ.get('DATABASE_REPLICA_URIS', '').split(',') if uri]
+REPLICA_PIN_SECONDS = 5
+
+# Connection pool and statement limits, overridable from the environment
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+# Seconds a request waits for a pooled connection before failing
+DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+# Seconds after which a connection is replaced, to stay below server-side idle timeouts
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+# Per-statement timeout of requests in milliseconds, 0 to disable. CLI jobs run without one.
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 5000))
+
+# Serving through asgi.py: the async driver of the listing, search and detail pages, whose
+# engines pool DB_POOL_SIZE connections per bind, and the threads running the other routes
+ASYNC_DATABASE_DRIVER = 'postgresql+asyncpg'
+ASGI_SYNC_THREADS = int(os.environ.get('ASGI_SYNC_THREADS', 16))
+
+# Maximum number of ranked results returned by the venue and artist search
+SEARCH_RESULT_LIMIT = 50
+
+# Number of rows per page on the venue, artist and show listings
+PAGE_SIZE = 50
+
+# Venue and artist detail page cache. Set DETAIL_CACHE_REDIS_URL to share it between worker
+# processes; otherwise each process keeps its own LRU of DETAIL_CACHE_SIZE entries.
+DETAIL_CACHE_SIZE = 1024
+DETAIL_CACHE_REDIS_URL = os.environ.get('DETAIL_CACHE_REDIS_URL')
+
+# Maximum number of ids accepted by a batch multi-get on the JSON API (?ids=1,2,3)
+API_MAX_IDS = 100
+
+# Compiled templates are cached on disk so that new workers skip compiling them. The directory
+# defaults to a private per-user directory under the temp dir.
+TEMPLATE_BYTECODE_CACHE = True
+TEMPLATE_BYTECODE_CACHE_DIR = os.environ.get('TEMPLATE_BYTECODE_CACHE_DIR')
+# Number of rendered {% cache %} fragments (e.g. show tiles) kept by each process, 0 to disable
+FRAGMENT_CACHE_SIZE = 10000
+
+# Number of busiest areas listed on the /shows/calendar heat map
+CALENDAR_AREAS = 25
+
+# Seconds before the in-process /autocomplete name indexes are reloaded to pick up the writes
+# of other processes, and the most matches returned per lookup
+AUTOCOMPLETE_MAX_AGE = 300
+AUTOCOMPLETE_MAX_RESULTS = 20
+
+# Default and largest search radius of /venues/near, in kilometres
+NEAR_DEFAULT_RADIUS_KM = 25
+NEAR_MAX_RADIUS_KM = 500
+
+# Longest period accepted by /venues/<id>/availability, in days
+AVAILABILITY_MAX_DAYS = 92
+
+# Maximum SQL statements per request for each endpoint. Exceeding a budget logs a warning, or
+# raises QueryBudgetExceeded when testing or when QUERY_BUDGET_RAISE is set.
+# The async detail views of asgi.py load the past and upcoming shows with two concurrent
+# statements, one more than the sync views.
+QUERY_BUDGETS = {
+    'index': 0,
+    'venues.venues': 1,
+    'artists.artists': 1,
+    'shows.shows': 1,
+    'venues.search_venues': 1,
+    'artists.search_artists': 1,
+    'venues.show_venue': 4,
+    'artists.show_artist': 4,
+    'venues.venue_availability': 2,
+    'venues.venues_near': 1,
+    'autocomplete': 1,
+    'shows.shows_calendar': 1,
+    'api.venues': 1,
+    'api.venue': 1,
+    'api.artists': 1,
+    'api.artist': 1,
+    'api.shows': 1,
+    'api.show': 1,
+}
+QUERY_BUDGET_RAISE = False
+# Number of slowest statements of each request written to the debug log
+SLOW_STATEMENTS_LOGGED = 3
+
+# Shared directory aggregating /metrics across worker processes. It must be set in the
+# environment before the workers start and be emptied between server runs. The child_exit hook
+# of gunicorn.conf.py removes the live gauges of exited workers.
+PROMETHEUS_MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+
+# Cache lifetime of the fingerprinted assets built by 'flask build-assets' (one year)
+ASSETS_MAX_AGE = 31536000
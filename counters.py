@@ -0,0 +1,101 @@
+from datetime import datetime
+
+from sqlalchemy import and_, cast, exists, func, select
+
+from models import db, Venue, Artist, Show, ShowMonth
+
+
+def _expected_counts(model, show_key):
+    upcoming = select([func.count(Show.id)]).where(and_(show_key == model.id, Show.is_upcoming)).as_scalar()
+    past = select([func.count(Show.id)]).where(and_(show_key == model.id, ~Show.is_upcoming)).as_scalar()
+    return upcoming, past
+
+
+def _show_counts(show_key):
+    return db.session.query(
+        show_key.label('key'),
+        func.count(Show.id).filter(Show.is_upcoming).label('upcoming'),
+        func.count(Show.id).filter(~Show.is_upcoming).label('past')
+    ).group_by(show_key).subquery()
+
+
+def roll_over_shows(now=None):
+    '''
+    Move shows that have started since the last run from the upcoming to the past counters.
+    Returns the number of shows moved.
+    '''
+    now = now or datetime.now()
+    started = and_(Show.is_upcoming, Show.start_time <= now)
+
+    for model, show_key in ((Venue, Show.venue_id), (Artist, Show.artist_id)):
+        moved = db.session.query(
+            show_key.label('key'), func.count(Show.id).label('n')
+        ).filter(started).group_by(show_key).subquery()
+
+        db.session.execute(model.__table__.update().values(
+            upcoming_shows_count=model.upcoming_shows_count - moved.c.n,
+            past_shows_count=model.past_shows_count + moved.c.n
+        ).where(model.id == moved.c.key))
+
+    count = Show.query.filter(started).update({Show.is_upcoming: False}, synchronize_session=False)
+    db.session.commit()
+
+    return count
+
+
+def _show_months():
+    month = cast(func.date_trunc('month', Show.start_time), db.Date)
+    return db.session.query(
+        month.label('month'), Venue.state, Venue.city, func.count(Show.id).label('show_count')
+    ).join(Venue, Venue.id == Show.venue_id).group_by(month, Venue.state, Venue.city)
+
+
+def rebuild_show_counters(now=None):
+    '''
+    Recompute every show counter and the ShowMonth rollup from the Show table
+    '''
+    now = now or datetime.now()
+
+    Show.query.update({Show.is_upcoming: Show.start_time > now}, synchronize_session=False)
+
+    # One aggregation of the Show table per side: correlated counts per row are planned from the
+    # statistics taken before the is_upcoming update above, and can scan every upcoming show
+    for model, show_key in ((Venue, Show.venue_id), (Artist, Show.artist_id)):
+        counts = _show_counts(show_key)
+        db.session.execute(model.__table__.update().values(
+            upcoming_shows_count=counts.c.upcoming,
+            past_shows_count=counts.c.past
+        ).where(model.id == counts.c.key))
+        model.query.filter(~exists().where(show_key == model.id)).update({
+            model.upcoming_shows_count: 0,
+            model.past_shows_count: 0
+        }, synchronize_session=False)
+
+    ShowMonth.query.delete(synchronize_session=False)
+    db.session.execute(ShowMonth.__table__.insert().from_select(
+        ['month', 'state', 'city', 'show_count'], _show_months().subquery().select()
+    ))
+
+    db.session.commit()
+
+
+def check_show_counters():
+    '''
+    Return the ids of venues and artists whose counters disagree with the Show table, and the
+    (month, state, city) keys of the ShowMonth rows that do
+    '''
+    mismatches = {}
+
+    for model, show_key in ((Venue, Show.venue_id), (Artist, Show.artist_id)):
+        upcoming, past = _expected_counts(model, show_key)
+        rows = db.session.query(model.id).filter(
+            (model.upcoming_shows_count != upcoming) | (model.past_shows_count != past)
+        ).all()
+        mismatches[model.__tablename__] = [r.id for r in rows]
+
+    expected = {(r.month, r.state, r.city): r.show_count for r in _show_months()}
+    actual = {(r.month, r.state, r.city): r.show_count for r in ShowMonth.query.filter(ShowMonth.show_count != 0)}
+    mismatches[ShowMonth.__tablename__] = sorted(k for k in expected.keys() | actual.keys()
+                                                 if expected.get(k) != actual.get(k))
+
+    return mismatches
@@ -0,0 +1,41 @@
+from datetime import datetime
+from functools import lru_cache
+
+DATETIME_FORMATS = {
+    'full': "EEEE MMMM, d, y 'at' h:mma",
+    'medium': "EE MM, dd, y h:mma"
+}
+
+
+@lru_cache(maxsize=None)
+def _compiled_pattern(format, locale):
+    # Babel loads its locale data on import, so it is imported by the first page rendering a date
+    import babel.dates
+    from babel import Locale
+
+    return babel.dates.parse_pattern(DATETIME_FORMATS.get(format, format)), Locale.parse(locale)
+
+
+def _parse_datetime(value):
+    # Fast path for the format produced by Show.format()
+    try:
+        return datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        import dateutil.parser
+        return dateutil.parser.parse(value)
+
+
+@lru_cache(maxsize=4096)
+def _render_datetime(value, format, locale):
+    if isinstance(value, str):
+        value = _parse_datetime(value)
+    pattern, locale = _compiled_pattern(format, locale)
+    return pattern.apply(value, locale)
+
+
+def format_datetime(value, format='medium', locale='en'):
+    '''
+    Jinja filter rendering a datetime, or a string holding one, with a babel pattern
+    or one of the named DATETIME_FORMATS
+    '''
+    return _render_datetime(value, format, locale)
@@ -0,0 +1,16 @@
+'''
+Gunicorn settings, read from the working directory or given with -c:
+
+  $ gunicorn -c gunicorn.conf.py 'app:create_app()'
+'''
+import os
+
+
+def child_exit(server, worker):
+    '''
+    Drop the live gauge of requests in progress of a worker that exited from the /metrics
+    aggregated over PROMETHEUS_MULTIPROC_DIR, so that restarted workers are not counted twice
+    '''
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
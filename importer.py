@@ -0,0 +1,334 @@
+import csv
+import io
+import json
+import os
+import time
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, bindparam, func, tuple_
+from sqlalchemy.dialects import postgresql
+from werkzeug.datastructures import MultiDict
+
+from forms import VenueForm, ArtistForm, ShowForm
+from models import db, write_listeners, Venue, Artist, Show, Geocode, count_show_months, month_of
+from queries import booked_shows
+
+VENUE_COLUMNS = ('name', 'city', 'state', 'address', 'phone', 'image_link', 'facebook_link', 'website',
+                 'seeking_talent', 'seeking_description', 'genres', 'latitude', 'longitude')
+ARTIST_COLUMNS = ('name', 'city', 'state', 'phone', 'image_link', 'facebook_link', 'website',
+                  'seeking_venue', 'seeking_description', 'genres')
+SHOW_COLUMNS = ('venue_id', 'artist_id', 'start_time', 'end_time', 'is_upcoming')
+
+
+class ImportStats:
+    def __init__(self):
+        self.read = 0
+        self.imported = 0
+        self.rejected = 0
+        self.started = time.perf_counter()
+
+    @property
+    def rows_per_second(self):
+        return self.imported / max(time.perf_counter() - self.started, 1e-9)
+
+    def __str__(self):
+        return '{} read, {} imported, {} rejected in {:.1f}s ({:.0f} rows/s)'.format(
+            self.read, self.imported, self.rejected, time.perf_counter() - self.started, self.rows_per_second)
+
+
+def read_rows(path):
+    '''
+    Stream rows from a CSV file (with a header line) or an NDJSON file, one dict at a time
+    '''
+    with open(path, newline='', encoding='utf-8') as f:
+        if os.path.splitext(path)[1].lower() in ('.ndjson', '.jsonl'):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def _formdata(row):
+    formdata = MultiDict()
+    for key, value in row.items():
+        if value is None or value == '':
+            continue
+        if key == 'genres':
+            genres = value.split(',') if isinstance(value, str) else value
+            for genre in genres:
+                formdata.add(key, genre.strip())
+        elif isinstance(value, bool):
+            if value:
+                formdata.add(key, 'y')
+        elif key.startswith('seeking_') and key != 'seeking_description':
+            if str(value).lower() in ('y', 'yes', 'true', 't', '1'):
+                formdata.add(key, 'y')
+        else:
+            formdata.add(key, str(value))
+    return formdata
+
+
+def _validate(form_class, row):
+    form = form_class(formdata=_formdata(row), meta={'csrf': False})
+    if form.validate():
+        return form.data, None
+    return None, form.errors
+
+
+def _batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _copy_value(value):
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, list):
+        return '{' + ','.join('"{}"'.format(v.replace('\\', '\\\\').replace('"', '\\"')) for v in value) + '}'
+    return value
+
+
+def _write(table, columns, rows):
+    '''
+    Bulk insert rows into the table, with COPY on PostgreSQL and executemany elsewhere
+    '''
+    connection = db.session.connection()
+
+    if connection.dialect.name != 'postgresql':
+        connection.execute(table.insert(), [{c: row[c] for c in columns} for row in rows])
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(row[c]) for c in columns])
+    buffer.seek(0)
+
+    cursor = connection.connection.cursor()
+    cursor.copy_expert('COPY "{}" ({}) FROM STDIN WITH (FORMAT csv)'.format(
+        table.name, ', '.join(columns)), buffer)
+
+
+def _existing_ids(model, ids):
+    if not ids:
+        return set()
+    return {r.id for r in db.session.query(model.id).filter(model.id.in_(ids))}
+
+
+def _booked_periods(rows):
+    '''
+    Periods already booked at the venues of a batch of shows during the batch's time span, as
+    sorted lists of (start_time, end_time) by venue
+    '''
+    periods = defaultdict(list)
+    if not rows:
+        return periods
+
+    start_time = min(r['start_time'] for r in rows)
+    end_time = max(r['end_time'] for r in rows)
+    for show in booked_shows({r['venue_id'] for r in rows}, start_time, end_time).order_by(Show.start_time):
+        periods[show.venue_id].append((show.start_time, show.end_time))
+    return periods
+
+
+def _overlaps(periods, start_time, end_time):
+    # Booked periods never overlap each other, so only the last one starting before end_time can
+    i = bisect_left(periods, (end_time,))
+    return i > 0 and periods[i - 1][1] > start_time
+
+
+def _resolve_shows(rows, reject):
+    '''
+    Check the venue and artist ids of a batch of shows with one query per table, and reject the
+    shows double booking a venue with one more query
+    '''
+    venue_ids = _existing_ids(Venue, {r['venue_id'] for r in rows})
+    artist_ids = _existing_ids(Artist, {r['artist_id'] for r in rows})
+    periods = _booked_periods([r for r in rows if r['venue_id'] in venue_ids])
+
+    resolved = []
+    for row in rows:
+        errors = {}
+        if row['venue_id'] not in venue_ids:
+            errors['venue_id'] = ['Unknown venue.']
+        elif _overlaps(periods[row['venue_id']], row['start_time'], row['end_time']):
+            errors['start_time'] = ['The venue is already booked at that time.']
+        if row['artist_id'] not in artist_ids:
+            errors['artist_id'] = ['Unknown artist.']
+        if errors:
+            reject(row['_line'], errors)
+        else:
+            insort(periods[row['venue_id']], (row['start_time'], row['end_time']))
+            resolved.append(row)
+    return resolved
+
+
+def _geocodes(areas):
+    '''
+    Locations of a set of (state, city) pairs found in the Geocode table, with one query
+    '''
+    keys = {(state, Geocode.normalize(city)): (state, city) for state, city in areas}
+    if not keys:
+        return {}
+
+    return {keys[(g.state, g.city)]: (g.latitude, g.longitude)
+            for g in Geocode.query.filter(tuple_(Geocode.state, Geocode.city).in_(list(keys)))}
+
+
+def _locate(rows):
+    '''
+    Fill in the coordinates of the venues of a batch that were imported without any
+    '''
+    missing = [row for row in rows if row['latitude'] is None or row['longitude'] is None]
+    locations = _geocodes({(row['state'], row['city']) for row in missing})
+    for row in missing:
+        row['latitude'], row['longitude'] = locations.get((row['state'], row['city']), (None, None))
+
+
+def _count_shows(rows):
+    '''
+    Apply the upcoming/past counters and the monthly rollup of a batch of shows with one
+    statement per table
+    '''
+    for model, key in ((Venue, 'venue_id'), (Artist, 'artist_id')):
+        deltas = Counter((row[key], row['is_upcoming']) for row in rows)
+        params = [{
+            'key': id,
+            'upcoming': deltas[(id, True)],
+            'past': deltas[(id, False)]
+        } for id in {row[key] for row in rows}]
+
+        db.session.execute(model.__table__.update().where(
+            model.id == bindparam('key')
+        ).values(
+            upcoming_shows_count=model.upcoming_shows_count + bindparam('upcoming'),
+            past_shows_count=model.past_shows_count + bindparam('past')
+        ), params)
+
+    areas = {r.id: (r.state, r.city) for r in db.session.query(Venue.id, Venue.state, Venue.city).filter(
+        Venue.id.in_({row['venue_id'] for row in rows}))}
+    count_show_months(Counter((month_of(row['start_time']),) + areas[row['venue_id']] for row in rows))
+
+
+def _validated(kind, rows, reject):
+    form_class = {'venues': VenueForm, 'artists': ArtistForm, 'shows': ShowForm}[kind]
+    now = datetime.now()
+
+    for line, row in enumerate(rows, start=1):
+        data, errors = _validate(form_class, row)
+        if kind == 'shows' and not row.get('start_time'):
+            errors = {'start_time': ['This field is required.']}
+        elif errors is None and kind == 'shows':
+            try:
+                data['venue_id'] = int(data['venue_id'])
+                data['artist_id'] = int(data['artist_id'])
+            except (TypeError, ValueError):
+                errors = {'id': ['Venue and artist ids must be integers.']}
+            else:
+                data['end_time'] = data['start_time'] + timedelta(minutes=data['duration'])
+                data['is_upcoming'] = data['start_time'] > now
+        if errors is not None:
+            reject(line, errors)
+            continue
+        data['_line'] = line
+        yield data
+
+
+def import_file(kind, path, batch_size=5000, rejects=None):
+    '''
+    Validate and bulk load venues, artists or shows from a CSV or NDJSON file, committing
+    once per batch. Rejected rows are written to the rejects file as NDJSON.
+    '''
+    stats = ImportStats()
+    model, columns = {
+        'venues': (Venue, VENUE_COLUMNS),
+        'artists': (Artist, ARTIST_COLUMNS),
+        'shows': (Show, SHOW_COLUMNS)
+    }[kind]
+
+    def reject(line, errors):
+        stats.rejected += 1
+        if rejects is not None:
+            rejects.write(json.dumps({'line': line, 'errors': errors}) + '\n')
+
+    def counted(rows):
+        for row in rows:
+            stats.read += 1
+            yield row
+
+    for batch in _batched(_validated(kind, counted(read_rows(path)), reject), batch_size):
+        if kind == 'venues':
+            _locate(batch)
+        if kind == 'shows':
+            batch = _resolve_shows(batch, reject)
+            if not batch:
+                continue
+            _count_shows(batch)
+
+        _write(model.__table__, columns, batch)
+        db.session.commit()
+        stats.imported += len(batch)
+
+        if kind == 'shows':
+            keys = {('venue', r['venue_id']) for r in batch} | {('artist', r['artist_id']) for r in batch}
+            for listener in write_listeners:
+                listener(None, tuple(keys))
+
+    return stats
+
+
+def load_geocodes(path, batch_size=5000):
+    '''
+    Load city locations from a CSV or NDJSON file with city, state, latitude and longitude columns
+    into the Geocode table, replacing the cities already known. Returns the number of rows loaded.
+    '''
+    table = Geocode.__table__
+    insert = postgresql.insert(table)
+    upsert = insert.on_conflict_do_update(
+        index_elements=[table.c.state, table.c.city],
+        set_={'latitude': insert.excluded.latitude, 'longitude': insert.excluded.longitude}
+    )
+
+    count = 0
+    for batch in _batched(read_rows(path), batch_size):
+        locations = {(row['state'].strip(), Geocode.normalize(row['city'])): row for row in batch}
+        db.session.execute(upsert, [{
+            'state': state,
+            'city': city,
+            'latitude': float(row['latitude']),
+            'longitude': float(row['longitude'])
+        } for (state, city), row in locations.items()])
+        db.session.commit()
+        count += len(locations)
+
+    return count
+
+
+def locate_venues():
+    '''
+    Set the coordinates of the venues that have none from the Geocode table, with one statement.
+    Returns the number of venues located.
+    '''
+    # The SQL counterpart of Geocode.normalize
+    city = func.lower(func.regexp_replace(func.btrim(Venue.city), r'\s+', ' ', 'g'))
+
+    result = db.session.execute(Venue.__table__.update().values(
+        latitude=Geocode.latitude,
+        longitude=Geocode.longitude
+    ).where(and_(
+        Venue.latitude.is_(None),
+        Geocode.state == Venue.state,
+        Geocode.city == city
+    )))
+    db.session.commit()
+
+    return result.rowcount
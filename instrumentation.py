@@ -0,0 +1,84 @@
+import heapq
+import time
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class RequestStats:
+    def __init__(self, keep_slowest):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest = []
+        self.keep_slowest = keep_slowest
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        entry = (duration, self.count, statement)
+        if len(self.slowest) < self.keep_slowest:
+            heapq.heappush(self.slowest, entry)
+        elif duration > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, entry)
+
+
+class QueryInstrumentation:
+    '''
+    Records the SQL statements of each request: their count, total database time and the
+    slowest ones. They are reported in a Server-Timing header and the log, and checked
+    against the per-endpoint QUERY_BUDGETS.
+    '''
+
+    def init_app(self, app):
+        # Engine events are global, so apps created after the first one share the listeners
+        if not event.contains(Engine, 'before_cursor_execute', self._before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+        app.before_request(self._start)
+        app.after_request(self._report)
+
+    def _start(self):
+        g.sql_stats = RequestStats(current_app.config['SLOW_STATEMENTS_LOGGED'])
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    @staticmethod
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info['query_start'].pop()
+        if has_request_context() and 'sql_stats' in g:
+            g.sql_stats.record(statement, duration)
+
+    def _report(self, response):
+        stats = g.get('sql_stats')
+        if stats is None:
+            return response
+
+        timings = ['db;desc="{} statements";dur={:.2f}'.format(stats.count, stats.duration * 1000)]
+        if 'pool_wait' in g:
+            timings.append('pool;dur={:.2f}'.format(g.pool_wait * 1000))
+        response.headers.add('Server-Timing', ', '.join(timings))
+
+        logger = current_app.logger
+        logger.info('%s %s: %d statements, %.1fms in the database',
+                    request.method, request.path, stats.count, stats.duration * 1000)
+        for duration, _, statement in sorted(stats.slowest, reverse=True):
+            logger.debug('  %.1fms %s', duration * 1000, ' '.join(statement.split()))
+
+        budget = current_app.config['QUERY_BUDGETS'].get(request.endpoint)
+        if budget is not None and stats.count > budget:
+            message = '{} issued {} SQL statements, over its budget of {}'.format(request.endpoint, stats.count, budget)
+            if current_app.testing or current_app.config['QUERY_BUDGET_RAISE']:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+        return response
+
+
+instrumentation = QueryInstrumentation()
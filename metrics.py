@@ -0,0 +1,117 @@
+import time
+
+from flask import Response, current_app, g, request, template_rendered, before_render_template
+from prometheus_client import (CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, CONTENT_TYPE_LATEST,
+                               generate_latest, multiprocess)
+from prometheus_client.core import GaugeMetricFamily
+
+from cache import detail_cache
+from models import db
+
+REQUEST_DURATION = Histogram(
+    'fyyur_request_duration_seconds', 'Time spent handling a request, including template rendering',
+    ['endpoint', 'method'])
+HANDLER_DURATION = Histogram(
+    'fyyur_request_handler_seconds', 'Time spent handling a request, excluding template rendering',
+    ['endpoint'])
+RENDER_DURATION = Histogram(
+    'fyyur_template_render_seconds', 'Time spent rendering a template', ['template'])
+IN_PROGRESS = Gauge(
+    'fyyur_requests_in_progress', 'Requests currently being handled', ['endpoint'], multiprocess_mode='livesum')
+CACHE_LOOKUPS = Counter(
+    'fyyur_cache_lookups_total', 'Detail page cache lookups by result', ['kind', 'result'])
+
+
+class PoolCollector:
+    '''
+    Connections of the app's database pools by bind and state, sampled when /metrics is scraped
+    rather than after every request. With several worker processes, these are the pools of the
+    worker serving the scrape.
+    '''
+
+    def __init__(self, app):
+        self.app = app
+
+    def collect(self):
+        connections = GaugeMetricFamily(
+            'fyyur_db_pool_connections', 'Database pool connections by bind and state', labels=['bind', 'state'])
+        for bind in [None] + self.app.config['REPLICA_BINDS']:
+            pool = db.get_engine(self.app, bind=bind).pool
+            connections.add_metric([bind or 'primary', 'checked_out'], pool.checkedout())
+            connections.add_metric([bind or 'primary', 'idle'], pool.checkedin())
+        yield connections
+
+
+class Metrics:
+    '''
+    Prometheus metrics served at /metrics. When PROMETHEUS_MULTIPROC_DIR is set (before the
+    workers start) the values of all worker processes are aggregated through memory-mapped
+    files in that directory, and gunicorn.conf.py drops the live gauges of exited workers.
+    The labelled children are kept in a dict, which is cheaper than looking them up with
+    labels() on every request.
+    '''
+
+    def __init__(self):
+        self._children = {}
+
+    def _child(self, metric, *labels):
+        key = (metric, labels)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = metric.labels(*labels)
+        return child
+
+    def init_app(self, app):
+        app.before_request(self._start)
+        app.teardown_request(self._finish)
+        before_render_template.connect(self._start_render, app)
+        template_rendered.connect(self._finish_render, app)
+        if self._cache_lookup not in detail_cache.lookup_listeners:
+            detail_cache.lookup_listeners.append(self._cache_lookup)
+        app.add_url_rule('/metrics', 'metrics', self.metrics)
+
+    @staticmethod
+    def _endpoint():
+        return request.endpoint or 'none'
+
+    def _start(self):
+        g.request_start = time.perf_counter()
+        g.render_time = 0.0
+        self._child(IN_PROGRESS, self._endpoint()).inc()
+
+    def _finish(self, exception=None):
+        if 'request_start' not in g:
+            return
+
+        endpoint = self._endpoint()
+        duration = time.perf_counter() - g.request_start
+        self._child(IN_PROGRESS, endpoint).dec()
+        self._child(REQUEST_DURATION, endpoint, request.method).observe(duration)
+        self._child(HANDLER_DURATION, endpoint).observe(duration - g.render_time)
+
+    @staticmethod
+    def _start_render(sender, template, context, **extra):
+        g.render_start = time.perf_counter()
+
+    def _finish_render(self, sender, template, context, **extra):
+        start = g.pop('render_start', None)
+        if start is None:
+            return
+        duration = time.perf_counter() - start
+        g.render_time = g.get('render_time', 0.0) + duration
+        self._child(RENDER_DURATION, template.name or 'string').observe(duration)
+
+    def _cache_lookup(self, kind, hit):
+        self._child(CACHE_LOOKUPS, kind, 'hit' if hit else 'miss').inc()
+
+    def metrics(self):
+        registry = CollectorRegistry()
+        if current_app.config['PROMETHEUS_MULTIPROC_DIR']:
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry.register(REGISTRY)
+        registry.register(PoolCollector(current_app._get_current_object()))
+        return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+metrics = Metrics()
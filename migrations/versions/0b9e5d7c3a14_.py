@@ -0,0 +1,51 @@
+"""show end times and double booking constraint
+
+Revision ID: 0b9e5d7c3a14
+Revises: f2a86c4d1e37
+Create Date: 2020-07-24 11:32:07.519846
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b9e5d7c3a14'
+down_revision = 'f2a86c4d1e37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    op.add_column('Show', sa.Column('end_time', sa.DateTime(), nullable=True))
+
+    # Existing shows last two hours, cut short where the next show at the same venue starts
+    # earlier so that the double bookings already recorded satisfy the constraint
+    op.execute(
+        'UPDATE "Show" SET end_time = ends.end_time FROM ('
+        'SELECT id, least(start_time + interval \'2 hours\', '
+        'lead(start_time) OVER (PARTITION BY venue_id ORDER BY start_time, id)) AS end_time FROM "Show"'
+        ') AS ends WHERE ends.id = "Show".id'
+    )
+    op.alter_column('Show', 'end_time', nullable=False)
+
+    # Shows starting at the same time and venue as another one are left with an empty period,
+    # which neither constraint accepts
+    clashes = [row[0] for row in op.get_bind().execute(
+        sa.text('SELECT id FROM "Show" WHERE end_time <= start_time ORDER BY id'))]
+    if clashes:
+        raise ValueError('Shows {} start at the same time and venue as another show. Move or delete them '
+                           'and run the upgrade again.'.format(', '.join(map(str, clashes))))
+
+    op.create_check_constraint('ck_Show_end_time', 'Show', 'end_time > start_time')
+    op.execute(
+        'ALTER TABLE "Show" ADD CONSTRAINT "ex_Show_venue_id_period" '
+        'EXCLUDE USING gist (venue_id WITH =, tsrange(start_time, end_time) WITH &&)'
+    )
+
+
+def downgrade():
+    op.drop_constraint('ex_Show_venue_id_period', 'Show')
+    op.drop_constraint('ck_Show_end_time', 'Show')
+    op.drop_column('Show', 'end_time')
@@ -0,0 +1,31 @@
+"""search indexes
+
+Revision ID: 5c1d8e2f9a40
+Revises: 47a3f7cf2a6e
+Create Date: 2020-07-02 18:21:44.308112
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1d8e2f9a40'
+down_revision = '47a3f7cf2a6e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The GIN indexes on genres are created by d71a3c5e8f02, once the columns are varchar arrays
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table in ('Venue', 'Artist'):
+        for column in ('name', 'city'):
+            op.create_index('ix_{}_{}_trgm'.format(table, column), table, [column],
+                            postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'})
+
+
+def downgrade():
+    for table in ('Venue', 'Artist'):
+        for column in ('name', 'city'):
+            op.drop_index('ix_{}_{}_trgm'.format(table, column), table_name=table)
@@ -0,0 +1,35 @@
+"""monthly show rollup
+
+Revision ID: 6a3f8e2b9d51
+Revises: 0b9e5d7c3a14
+Create Date: 2020-07-27 18:14:52.306671
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6a3f8e2b9d51'
+down_revision = '0b9e5d7c3a14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ShowMonth',
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('state', sa.String(length=120), nullable=False),
+    sa.Column('city', sa.String(length=120), nullable=False),
+    sa.Column('show_count', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('month', 'state', 'city')
+    )
+    op.execute(
+        'INSERT INTO "ShowMonth" (month, state, city, show_count) '
+        'SELECT date_trunc(\'month\', "Show".start_time)::date, "Venue".state, "Venue".city, count(*) '
+        'FROM "Show" JOIN "Venue" ON "Venue".id = "Show".venue_id GROUP BY 1, 2, 3'
+    )
+
+
+def downgrade():
+    op.drop_table('ShowMonth')
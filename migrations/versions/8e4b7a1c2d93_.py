@@ -0,0 +1,41 @@
+"""show counters
+
+Revision ID: 8e4b7a1c2d93
+Revises: 5c1d8e2f9a40
+Create Date: 2020-07-06 21:40:13.772019
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4b7a1c2d93'
+down_revision = '5c1d8e2f9a40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('Show', sa.Column('is_upcoming', sa.Boolean(), server_default='false', nullable=False))
+    op.create_index('ix_Show_upcoming_start_time', 'Show', ['start_time'], postgresql_where=sa.text('is_upcoming'))
+    for table in ('Venue', 'Artist'):
+        op.add_column(table, sa.Column('upcoming_shows_count', sa.Integer(), server_default='0', nullable=False))
+        op.add_column(table, sa.Column('past_shows_count', sa.Integer(), server_default='0', nullable=False))
+
+    op.execute('UPDATE "Show" SET is_upcoming = start_time > now()')
+    for table, key in (('Venue', 'venue_id'), ('Artist', 'artist_id')):
+        op.execute(
+            'UPDATE "{table}" SET '
+            'upcoming_shows_count = (SELECT count(*) FROM "Show" WHERE "Show".{key} = "{table}".id AND is_upcoming), '
+            'past_shows_count = (SELECT count(*) FROM "Show" WHERE "Show".{key} = "{table}".id AND NOT is_upcoming)'
+            .format(table=table, key=key)
+        )
+
+
+def downgrade():
+    for table in ('Venue', 'Artist'):
+        op.drop_column(table, 'past_shows_count')
+        op.drop_column(table, 'upcoming_shows_count')
+    op.drop_index('ix_Show_upcoming_start_time', table_name='Show')
+    op.drop_column('Show', 'is_upcoming')
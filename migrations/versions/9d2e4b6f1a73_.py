@@ -0,0 +1,25 @@
+"""venue name order index
+
+Revision ID: 9d2e4b6f1a73
+Revises: c48d2f7a1b69
+Create Date: 2020-08-03 11:02:37.415862
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d2e4b6f1a73'
+down_revision = 'c48d2f7a1b69'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keyset order of the /api/v1/venues listing; Artist has had its (name, id) index since b3f09d6e7c15
+    op.create_index('ix_Venue_name_id', 'Venue', ['name', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_Venue_name_id', table_name='Venue')
@@ -0,0 +1,32 @@
+"""show and listing indexes
+
+Revision ID: b3f09d6e7c15
+Revises: 8e4b7a1c2d93
+Create Date: 2020-07-14 10:02:37.190334
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3f09d6e7c15'
+down_revision = '8e4b7a1c2d93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_Show_venue_id_start_time', 'Show', ['venue_id', 'start_time'])
+    op.create_index('ix_Show_artist_id_start_time', 'Show', ['artist_id', 'start_time'])
+    op.create_index('ix_Show_start_time_id', 'Show', ['start_time', 'id'])
+    op.create_index('ix_Venue_state_city_name_id', 'Venue', ['state', 'city', 'name', 'id'])
+    op.create_index('ix_Artist_name_id', 'Artist', ['name', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_Artist_name_id', table_name='Artist')
+    op.drop_index('ix_Venue_state_city_name_id', table_name='Venue')
+    op.drop_index('ix_Show_start_time_id', table_name='Show')
+    op.drop_index('ix_Show_artist_id_start_time', table_name='Show')
+    op.drop_index('ix_Show_venue_id_start_time', table_name='Show')
@@ -0,0 +1,38 @@
+"""venue locations
+
+Revision ID: c48d2f7a1b69
+Revises: 6a3f8e2b9d51
+Create Date: 2020-07-30 10:47:26.913488
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c48d2f7a1b69'
+down_revision = '6a3f8e2b9d51'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS cube')
+    op.execute('CREATE EXTENSION IF NOT EXISTS earthdistance')
+    op.create_table('Geocode',
+    sa.Column('state', sa.String(length=120), nullable=False),
+    sa.Column('city', sa.String(length=120), nullable=False),
+    sa.Column('latitude', sa.Float(), nullable=False),
+    sa.Column('longitude', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('state', 'city')
+    )
+    op.add_column('Venue', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('Venue', sa.Column('longitude', sa.Float(), nullable=True))
+    op.create_index('ix_Venue_location', 'Venue', [sa.text('ll_to_earth(latitude, longitude)')], postgresql_using='gist')
+
+
+def downgrade():
+    op.drop_index('ix_Venue_location', table_name='Venue')
+    op.drop_column('Venue', 'longitude')
+    op.drop_column('Venue', 'latitude')
+    op.drop_table('Geocode')
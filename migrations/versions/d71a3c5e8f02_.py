@@ -0,0 +1,41 @@
+"""normalize genres arrays
+
+Revision ID: d71a3c5e8f02
+Revises: b3f09d6e7c15
+Create Date: 2020-07-20 16:48:51.604227
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd71a3c5e8f02'
+down_revision = 'b3f09d6e7c15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Artist genres may hold the array literal as text ('{Jazz,Rock}'); store them as real
+    # varchar arrays with clean elements, like Venue genres, then index them. Databases upgraded
+    # with an earlier version of 5c1d8e2f9a40 already have the indexes.
+    for table in ('Venue', 'Artist'):
+        op.execute('DROP INDEX IF EXISTS "ix_{}_genres"'.format(table))
+        op.execute('ALTER TABLE "{}" ALTER COLUMN genres TYPE varchar[] USING genres::text::varchar[]'.format(table))
+        op.execute(
+            'UPDATE "{}" SET genres = ARRAY(SELECT btrim(g, \'{{}}" \') FROM unnest(genres) AS g) '
+            'WHERE array_to_string(genres, \',\') ~ \'[{{}}"]\''.format(table)
+        )
+        op.create_index('ix_{}_genres'.format(table), table, ['genres'], postgresql_using='gin')
+
+    op.create_index('ix_Artist_state_city_name_id', 'Artist', ['state', 'city', 'name', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_Artist_state_city_name_id', table_name='Artist')
+
+    # The columns stay varchar[] with the cleaned elements: the text the artist genres may have
+    # held before is not restored. Only the GIN indexes that need the arrays are dropped.
+    for table in ('Artist', 'Venue'):
+        op.drop_index('ix_{}_genres'.format(table), table_name=table)
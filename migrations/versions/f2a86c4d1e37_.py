@@ -0,0 +1,28 @@
+"""row versions
+
+Revision ID: f2a86c4d1e37
+Revises: d71a3c5e8f02
+Create Date: 2020-07-22 19:05:41.228310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a86c4d1e37'
+down_revision = 'd71a3c5e8f02'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('Venue', 'Artist', 'Show'):
+        op.add_column(table, sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), server_default=sa.text("timezone('utc', now())"), nullable=False))
+
+
+def downgrade():
+    for table in ('Venue', 'Artist', 'Show'):
+        op.drop_column(table, 'updated_at')
+        op.drop_column(table, 'version')
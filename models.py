@@ -1,23 +1,179 @@
-from sqlalchemy import Integer, String, Boolean, DateTime, ARRAY, Column, ForeignKey
-from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
+import random
+import time
+from collections import defaultdict
+from datetime import datetime
 
-db = SQLAlchemy()
+from flask import g, has_request_context, request
+from sqlalchemy import String, Boolean, bindparam, cast, event, func, inspect, orm, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.pool import QueuePool
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
 
 
-def setup_db(app):
+class RoutingSession(SignallingSession):
     '''
-    Connect to the database by reading database settings from the config file
+    Session sending the reads of requests to the read replica picked for them in g.replica.
+    Flushes, and everything outside such requests, go to the primary.
     '''
-    app.config.from_object('config')
+
+    def __init__(self, db, **options):
+        # SignallingSession does not keep db
+        self.db = db
+        super().__init__(db, **options)
+
+    def get_bind(self, mapper=None, clause=None):
+        if not self._flushing and has_request_context() and g.get('replica'):
+            return self.db.get_engine(self.app, bind=g.replica)
+        return super().get_bind(mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+db = RoutingSQLAlchemy()
+
+UTC_NOW = text("timezone('utc', now())")
+
+# Callables invoked as listener(instance, keys) after a model write has been committed, where
+# keys are the ('venue', id) / ('artist', id) pairs whose pages the write affects
+write_listeners = []
+
+
+def _notify(instance, *keys):
+    for listener in write_listeners:
+        listener(instance, keys)
+
+
+def _mark_written(instance, keys):
+    if has_request_context():
+        g.db_written = True
+
+
+class TimedQueuePool(QueuePool):
+    '''
+    QueuePool recording how long each request waited to check out a connection in g.pool_wait,
+    reported in the Server-Timing header
+    '''
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if has_request_context():
+                g.pool_wait = g.get('pool_wait', 0.0) + time.perf_counter() - start
+
+
+def _execute_raw(dbapi_connection, statement):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(statement)
+    finally:
+        cursor.close()
+    dbapi_connection.commit()
+
+
+@event.listens_for(TimedQueuePool, 'checkout')
+def _scope_statement_timeout(dbapi_connection, connection_record, connection_proxy):
+    '''
+    DB_STATEMENT_TIMEOUT_MS only bounds requests. Connections checked out outside a request, e.g.
+    by the CLI jobs rebuilding counters or importing data, run without a timeout, which is reset
+    to the connection's default when a request checks them out again. A checked out connection
+    has no transaction in progress, so the change is committed at once.
+    '''
+    lifted = connection_record.info.get('statement_timeout_lifted', False)
+    if has_request_context():
+        if lifted:
+            _execute_raw(dbapi_connection, 'RESET statement_timeout')
+            connection_record.info['statement_timeout_lifted'] = False
+    elif not lifted:
+        _execute_raw(dbapi_connection, 'SET statement_timeout = 0')
+        connection_record.info['statement_timeout_lifted'] = True
+
+
+def engine_options(config):
+    '''
+    Build the SQLAlchemy engine options from the DB_* settings
+    '''
+    options = {
+        'poolclass': TimedQueuePool,
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING']
+    }
+    if config['DB_STATEMENT_TIMEOUT_MS']:
+        # Lifted outside requests by _scope_statement_timeout
+        options['connect_args'] = {'options': '-c statement_timeout={}'.format(config['DB_STATEMENT_TIMEOUT_MS'])}
+    return options
+
+
+class LazyMigrate:
+    '''
+    Placeholder for app.extensions['migrate'], which the Flask-Migrate 'flask db' commands read.
+    Flask-Migrate, and Alembic with it, is only imported and set up when one of them runs, not
+    by every process creating the app.
+    '''
+
+    def __init__(self, app):
+        self.app = app
+
+    def __getattr__(self, name):
+        from flask_migrate import Migrate
+
+        Migrate(self.app, db)
+        return getattr(self.app.extensions['migrate'], name)
+
+
+def setup_db(app, replica_uris=None):
+    '''
+    Connect to the database with the settings of the app's config. GET requests read from the
+    replica_uris (default SQLALCHEMY_REPLICA_URIS) when there are any.
+    '''
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+
+    if replica_uris is None:
+        replica_uris = app.config['SQLALCHEMY_REPLICA_URIS']
+    binds = {'replica_{}'.format(i): uri for i, uri in enumerate(replica_uris)}
+    app.config['SQLALCHEMY_BINDS'] = dict(app.config.get('SQLALCHEMY_BINDS') or {}, **binds)
+    app.config['REPLICA_BINDS'] = list(binds)
+
     db.app = app
     db.init_app(app)
-    migrate = Migrate(app, db)
+    app.extensions['migrate'] = LazyMigrate(app)
+
+    @app.before_request
+    def route_reads():
+        # One replica for the whole request, so that all its reads are equally up to date
+        pinned_until = request.cookies.get('primary_until', type=float)
+        use_replica = request.method in ('GET', 'HEAD') and not (pinned_until and pinned_until > time.time())
+        g.replica = random.choice(app.config['REPLICA_BINDS']) if use_replica and app.config['REPLICA_BINDS'] else None
+
+    @app.after_request
+    def pin_writes_to_primary(response):
+        if app.config['REPLICA_BINDS'] and (request.method not in ('GET', 'HEAD') or g.get('db_written')):
+            pin_seconds = app.config['REPLICA_PIN_SECONDS']
+            response.set_cookie('primary_until', str(time.time() + pin_seconds), max_age=pin_seconds, httponly=True)
+        return response
+
+    if _mark_written not in write_listeners:
+        write_listeners.append(_mark_written)
+
     return db
 
 
 class Venue(db.Model):
     __tablename__ = 'Venue'
+    __table_args__ = (
+        db.Index('ix_Venue_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+        db.Index('ix_Venue_city_trgm', 'city', postgresql_using='gin', postgresql_ops={'city': 'gin_trgm_ops'}),
+        db.Index('ix_Venue_genres', 'genres', postgresql_using='gin'),
+        db.Index('ix_Venue_name_id', 'name', 'id'),
+        db.Index('ix_Venue_state_city_name_id', 'state', 'city', 'name', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String, nullable=False)
@@ -30,9 +186,21 @@ class Venue(db.Model):
     website = db.Column(String(120))
     seeking_talent = db.Column(Boolean)
     seeking_description = db.Column(String(500))
-    genres = db.Column(db.ARRAY(db.String), nullable=False)
+    genres = db.Column(postgresql.ARRAY(db.String), nullable=False)
+    # Supplied at import time, or the city's location from the Geocode table
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Incremented by every ORM update, which fails if the row changed since it was loaded
+    version = db.Column(db.Integer, nullable=False, server_default='1')
+    # Also bumped by the bulk counter updates, so it covers everything rendered from the row
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow,
+                           server_default=UTC_NOW)
     shows = db.relationship('Show', backref='Venue', lazy='dynamic')
 
+    __mapper_args__ = {'version_id_col': version}
+
     def __init__(self, name, city, state, address, phone, image_link, facebook_link, website, seeking_talent,\
          seeking_description, genres):
         self.name = name
@@ -47,16 +215,37 @@ class Venue(db.Model):
         self.seeking_description = seeking_description
         self.genres = genres
 
+    def locate(self):
+        '''
+        Set the coordinates to the location of the venue's city in the Geocode table, if known
+        '''
+        location = Geocode.query.get((self.state, Geocode.normalize(self.city)))
+        self.latitude, self.longitude = (location.latitude, location.longitude) if location else (None, None)
+
     def insert(self):
+        if self.latitude is None:
+            self.locate()
         db.session.add(self)
         db.session.commit()
+        _notify(self, ('venue', self.id))
 
     def update(self):
+        state = inspect(self)
+        old_area = ((state.attrs.state.history.deleted or [self.state])[0],
+                    (state.attrs.city.history.deleted or [self.city])[0])
+        if old_area != (self.state, self.city):
+            _move_show_months(self.id, old_area, (self.state, self.city))
+            if not state.attrs.latitude.history.has_changes():
+                self.locate()
+        _touch_show_partners(self)
         db.session.commit()
+        _notify(self, ('venue', self.id))
 
     def delete(self):
+        key = ('venue', self.id)
         db.session.delete(self)
         db.session.commit()
+        _notify(self, key)
 
     def format(self):
         return {
@@ -71,28 +260,74 @@ class Venue(db.Model):
             'website': self.website,
             'seeking_talent': self.seeking_talent,
             'seeking_description': self.seeking_description,
-            'genres': self.genres
+            'genres': list(self.genres),
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+            'upcoming_shows_count': self.upcoming_shows_count,
+            'past_shows_count': self.past_shows_count,
+            'version': self.version
         }
 
     def __repr__(self):
         return f'<Venue ID: {self.id}, Venue Name: {self.name}>'
 
+
+# Distance searches use earthdistance's ll_to_earth(latitude, longitude) points in this GiST index
+db.Index('ix_Venue_location', func.ll_to_earth(Venue.latitude, Venue.longitude), postgresql_using='gist')
+
+
+class Geocode(db.Model):
+    '''
+    Offline city geocoding table, loaded with 'flask load-geocodes'
+    '''
+    __tablename__ = 'Geocode'
+
+    state = db.Column(db.String(120), primary_key=True)
+    # Normalized with Geocode.normalize
+    city = db.Column(db.String(120), primary_key=True)
+    latitude = db.Column(db.Float, nullable=False)
+    longitude = db.Column(db.Float, nullable=False)
+
+    @staticmethod
+    def normalize(city):
+        return ' '.join(city.split()).lower()
+
+    def __repr__(self):
+        return f'<Geocode {self.city}, {self.state}: {self.latitude}, {self.longitude}>'
+
+
 class Artist(db.Model):
     __tablename__ = 'Artist'
+    __table_args__ = (
+        db.Index('ix_Artist_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+        db.Index('ix_Artist_city_trgm', 'city', postgresql_using='gin', postgresql_ops={'city': 'gin_trgm_ops'}),
+        db.Index('ix_Artist_genres', 'genres', postgresql_using='gin'),
+        db.Index('ix_Artist_name_id', 'name', 'id'),
+        db.Index('ix_Artist_state_city_name_id', 'state', 'city', 'name', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String, nullable=False)
     city = db.Column(db.String(120), nullable=False)
     state = db.Column(db.String(120), nullable=False)
     phone = db.Column(db.String(120))
-    genres = db.Column(db.ARRAY(db.String), nullable=False)
+    genres = db.Column(postgresql.ARRAY(db.String), nullable=False)
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
     website = db.Column(String(120))
     seeking_venue = db.Column(Boolean)
     seeking_description = db.Column(String(500))
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Incremented by every ORM update, which fails if the row changed since it was loaded
+    version = db.Column(db.Integer, nullable=False, server_default='1')
+    # Also bumped by the bulk counter updates, so it covers everything rendered from the row
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow,
+                           server_default=UTC_NOW)
     shows = db.relationship('Show', backref='Artist', lazy='dynamic')
 
+    __mapper_args__ = {'version_id_col': version}
+
     def __init__(self, name, city, state, phone, image_link, facebook_link, website, seeking_venue,\
          seeking_description, genres):
         self.name = name
@@ -109,13 +344,18 @@ class Artist(db.Model):
     def insert(self):
         db.session.add(self)
         db.session.commit()
+        _notify(self, ('artist', self.id))
 
     def update(self):
+        _touch_show_partners(self)
         db.session.commit()
+        _notify(self, ('artist', self.id))
 
     def delete(self):
+        key = ('artist', self.id)
         db.session.delete(self)
         db.session.commit()
+        _notify(self, key)
 
     def format(self):
         return {
@@ -129,7 +369,10 @@ class Artist(db.Model):
             'website': self.website,
             'seeking_venue': self.seeking_venue,
             'seeking_description': self.seeking_description,
-            'genres': ''.join(list(filter(lambda x : x!= '{' and x!='}', self.genres ))).split(',')
+            'genres': list(self.genres),
+            'upcoming_shows_count': self.upcoming_shows_count,
+            'past_shows_count': self.past_shows_count,
+            'version': self.version
         }
 
     def __repr__(self):
@@ -143,29 +386,85 @@ class Show(db.Model):
     venue_id = db.Column(db.Integer, db.ForeignKey('Venue.id'), nullable=False)
     artist_id = db.Column(db.Integer, db.ForeignKey('Artist.id'), nullable=False)
     start_time = db.Column(db.DateTime, nullable=False)
+    end_time = db.Column(db.DateTime, nullable=False)
+    # Whether the show is currently counted in upcoming_shows_count rather than past_shows_count
+    is_upcoming = db.Column(db.Boolean, nullable=False, default=False, server_default='false')
+    # Incremented by every ORM update, which fails if the row changed since it was loaded
+    version = db.Column(db.Integer, nullable=False, server_default='1')
+    # Also bumped by the bulk counter updates, so it covers everything rendered from the row
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow,
+                           server_default=UTC_NOW)
 
-    def __init__(self, venue_id, artist_id, start_time):
+    __table_args__ = (
+        db.Index('ix_Show_upcoming_start_time', 'start_time', postgresql_where=is_upcoming),
+        db.Index('ix_Show_venue_id_start_time', 'venue_id', 'start_time'),
+        db.Index('ix_Show_artist_id_start_time', 'artist_id', 'start_time'),
+        db.Index('ix_Show_start_time_id', 'start_time', 'id'),
+        # Empty periods overlap nothing, so they would escape the exclusion constraint
+        db.CheckConstraint('end_time > start_time', name='ck_Show_end_time'),
+        # Rejects double bookings. Its GiST index (which needs btree_gist for venue_id) also
+        # serves the overlap queries of queries.booked_shows.
+        postgresql.ExcludeConstraint(
+            (venue_id, '='), (func.tsrange(start_time, end_time), '&&'),
+            name='ex_Show_venue_id_period', using='gist'
+        ),
+    )
+
+    __mapper_args__ = {'version_id_col': version}
+
+    def __init__(self, venue_id, artist_id, start_time, end_time):
         self.venue_id = venue_id
         self.artist_id = artist_id
         self.start_time = start_time
+        self.end_time = end_time
 
     def insert(self):
+        self.is_upcoming = self.start_time > datetime.now()
         db.session.add(self)
+        _count_show(self.venue_id, self.artist_id, self.is_upcoming, 1)
+        count_show_months({_show_month(self.venue_id, self.start_time): 1})
+        keys = (('venue', self.venue_id), ('artist', self.artist_id))
         db.session.commit()
+        _notify(self, *keys)
 
     def update(self):
+        state = inspect(self)
+        old_venue_id = (state.attrs.venue_id.history.deleted or [self.venue_id])[0]
+        old_artist_id = (state.attrs.artist_id.history.deleted or [self.artist_id])[0]
+        old_start_time = (state.attrs.start_time.history.deleted or [self.start_time])[0]
+        was_upcoming = self.is_upcoming
+
+        self.is_upcoming = self.start_time > datetime.now()
+        _count_show(old_venue_id, old_artist_id, was_upcoming, -1)
+        _count_show(self.venue_id, self.artist_id, self.is_upcoming, 1)
+
+        months = defaultdict(int)
+        months[_show_month(old_venue_id, old_start_time)] -= 1
+        months[_show_month(self.venue_id, self.start_time)] += 1
+        count_show_months(months)
+        keys = (('venue', old_venue_id), ('artist', old_artist_id), ('venue', self.venue_id), ('artist', self.artist_id))
         db.session.commit()
+        _notify(self, *keys)
 
     def delete(self):
+        keys = (('venue', self.venue_id), ('artist', self.artist_id))
+        _count_show(self.venue_id, self.artist_id, self.is_upcoming, -1)
+        count_show_months({_show_month(self.venue_id, self.start_time): -1})
         db.session.delete(self)
         db.session.commit()
+        _notify(self, *keys)
 
     def format(self):
+        '''
+        Format a single loaded show. Listings should use queries.show_feed instead, which
+        loads the venue and artist columns in the same query.
+        '''
         return {
             'id': self.id,
             'venue_id': self.venue_id,
             'artist_id': self.artist_id,
             'start_time': self.start_time.strftime('%Y-%m-%d %H:%M:%S'),
+            'end_time': self.end_time.strftime('%Y-%m-%d %H:%M:%S'),
             'venue_name': self.Venue.name,
             'artist_name': self.Artist.name,
             'artist_image_link': self.Artist.image_link,
@@ -173,4 +472,86 @@ class Show(db.Model):
         }
 
     def __repr__(self):
-        return f'<Show ID: {self.id}, Show Venue: {self.venue_id}, Show Artist: {self.artist_id}, Time: {self.start_time}>'
\ No newline at end of file
+        return f'<Show ID: {self.id}, Show Venue: {self.venue_id}, Show Artist: {self.artist_id}, Time: {self.start_time}>'
+
+
+def _count_show(venue_id, artist_id, is_upcoming, delta):
+    '''
+    Adjust the upcoming or past show counter of a venue and an artist in the current transaction
+    '''
+    for model, key in ((Venue, venue_id), (Artist, artist_id)):
+        column = model.upcoming_shows_count if is_upcoming else model.past_shows_count
+        model.query.filter_by(id=key).update({column: column + delta}, synchronize_session=False)
+
+
+def _touch_show_partners(instance):
+    '''
+    Bump updated_at of the artists (or venues) sharing shows with a venue (or artist) whose name
+    or image changed, in the current transaction, since their detail pages show these
+    '''
+    state = inspect(instance)
+    if not any(state.attrs[field].history.has_changes() for field in ('name', 'image_link')):
+        return
+
+    show_key, other, other_key = ((Show.venue_id, Artist, Show.artist_id) if isinstance(instance, Venue)
+                                  else (Show.artist_id, Venue, Show.venue_id))
+    partners = db.session.query(other_key).filter(show_key == instance.id)
+    other.query.filter(other.id.in_(partners)).update({other.updated_at: datetime.utcnow()}, synchronize_session=False)
+
+
+class ShowMonth(db.Model):
+    '''
+    Number of shows starting in each month in each venue area, kept up to date by the Show write
+    methods for the calendar heat map. The primary key serves range scans over months.
+    '''
+    __tablename__ = 'ShowMonth'
+
+    month = db.Column(db.Date, primary_key=True)
+    state = db.Column(db.String(120), primary_key=True)
+    city = db.Column(db.String(120), primary_key=True)
+    show_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    def __repr__(self):
+        return f'<ShowMonth {self.month:%Y-%m} {self.city}, {self.state}: {self.show_count}>'
+
+
+def month_of(start_time):
+    return start_time.date().replace(day=1)
+
+
+def _show_month(venue_id, start_time):
+    venue = Venue.query.get(venue_id)
+    return month_of(start_time), venue.state, venue.city
+
+
+def count_show_months(deltas):
+    '''
+    Add {(month, state, city): delta} to the ShowMonth rollup in the current transaction, with one
+    upsert per month and area
+    '''
+    params = [{'month': month, 'state': state, 'city': city, 'delta': delta}
+              for (month, state, city), delta in deltas.items() if delta]
+    if not params:
+        return
+
+    table = ShowMonth.__table__
+    insert = postgresql.insert(table).values(
+        month=bindparam('month'), state=bindparam('state'), city=bindparam('city'), show_count=bindparam('delta')
+    )
+    db.session.execute(insert.on_conflict_do_update(
+        index_elements=[table.c.month, table.c.state, table.c.city],
+        set_={'show_count': table.c.show_count + insert.excluded.show_count}
+    ), params)
+
+
+def _move_show_months(venue_id, old_area, new_area):
+    '''
+    Move the shows of a venue between areas in the ShowMonth rollup when its city or state changes
+    '''
+    month = cast(func.date_trunc('month', Show.start_time), db.Date)
+    deltas = defaultdict(int)
+    for row in db.session.query(month.label('month'), func.count(Show.id).label('n')).filter(
+            Show.venue_id == venue_id).group_by(month):
+        deltas[(row.month,) + old_area] -= row.n
+        deltas[(row.month,) + new_area] += row.n
+    count_show_months(deltas)
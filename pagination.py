@@ -0,0 +1,85 @@
+import base64
+import json
+from datetime import date
+
+from sqlalchemy import tuple_
+
+
+def _default(value):
+    if isinstance(value, date):
+        return value.isoformat(' ')
+    raise TypeError(repr(value))
+
+
+def encode_cursor(values):
+    '''
+    Encode the sort key of the last row of a page as an opaque url-safe string
+    '''
+    raw = json.dumps(values, default=_default, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _cursor_value(column, value):
+    '''
+    A cursor value as the Python type of its order column, raising ValueError if it has another
+    type. Dates and times are parsed from their encode_cursor strings. Strings may not contain
+    NUL characters, which PostgreSQL rejects.
+    '''
+    python_type = column.type.python_type
+    if issubclass(python_type, date) and isinstance(value, str):
+        value = python_type.fromisoformat(value)
+    if not isinstance(value, python_type) or isinstance(value, bool) and python_type is not bool:
+        raise ValueError('Invalid cursor')
+    if isinstance(value, str) and '\x00' in value:
+        raise ValueError('Invalid cursor')
+    return value
+
+
+def decode_cursor(cursor, columns):
+    '''
+    Decode a cursor produced by encode_cursor for the given order columns, raising ValueError if
+    it is malformed or its values do not match the types of the columns
+    '''
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (TypeError, ValueError) as e:
+        raise ValueError('Invalid cursor') from e
+
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError('Invalid cursor')
+
+    return [_cursor_value(column, value) for column, value in zip(columns, values)]
+
+
+def keyset_query(query, columns, cursor, limit):
+    '''
+    Restrict the query to one page ordered by the given columns, starting after the cursor.
+    One extra row is fetched to tell whether there is a next page.
+    '''
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        query = query.filter(tuple_(*columns) > tuple(values))
+
+    return query.order_by(*columns).limit(limit + 1)
+
+
+def keyset_rows(rows, columns, limit):
+    '''
+    Trim the rows fetched with keyset_query to the page, and return them together with the
+    cursor of the next page (None on the last page)
+    '''
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], c.key) for c in columns])
+
+    return rows, next_cursor
+
+
+def keyset_page(query, columns, cursor, limit):
+    '''
+    Return one page of the query ordered by the given columns, starting after the cursor,
+    together with the cursor of the next page (None on the last page)
+    '''
+    return keyset_rows(keyset_query(query, columns, cursor, limit).all(), columns, limit)
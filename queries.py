@@ -0,0 +1,426 @@
+from collections import defaultdict
+from datetime import date, datetime
+from itertools import groupby
+
+from sqlalchemy import and_, func, select
+
+from conditional import make_etag
+from models import db, Venue, Artist, Show, ShowMonth
+from pagination import keyset_page, keyset_query, keyset_rows
+
+VENUE_ORDER = [Venue.state, Venue.city, Venue.name, Venue.id]
+ARTIST_ORDER = [Artist.name, Artist.id]
+SHOW_ORDER = [Show.start_time, Show.id]
+
+
+def location_filters(args):
+    '''
+    The genre, state and city listing filters present in the query string arguments
+    '''
+    return {key: args[key] for key in ('genre', 'state', 'city') if args.get(key)}
+
+
+def filter_location(query, model, genre=None, state=None, city=None):
+    '''
+    Restrict a venue or artist query to a genre (through the genres GIN index) and a state and city
+    '''
+    if genre:
+        query = query.filter(model.genres.contains([genre]))
+    if state:
+        query = query.filter(model.state == state)
+    if city:
+        query = query.filter(model.city == city)
+    return query
+
+
+def venue_areas_query(cursor=None, limit=50, **filters):
+    '''
+    One page of venues ordered by area with their number of upcoming shows, optionally
+    filtered by genre, state and city
+    '''
+    query = filter_location(db.session.query(
+        Venue.id,
+        Venue.name,
+        Venue.city,
+        Venue.state,
+        Venue.version,
+        Venue.upcoming_shows_count.label('num_upcoming_shows')
+    ), Venue, **filters)
+
+    return keyset_query(query, VENUE_ORDER, cursor, limit)
+
+
+def group_areas(rows):
+    '''
+    Group venue rows ordered by state and city into the areas listed by pages/venues.html
+    '''
+    areas = []
+
+    for (state, city), venues in groupby(rows, key=lambda r: (r.state, r.city)):
+        areas.append({
+            'city': city,
+            'state': state,
+            'venues': [{
+                'id': v.id,
+                'name': v.name,
+                'version': v.version,
+                'num_upcoming_shows': v.num_upcoming_shows
+            } for v in venues]
+        })
+
+    return areas
+
+
+def venue_areas(cursor=None, limit=50, **filters):
+    '''
+    Group one page of venues by city and state with their number of upcoming shows,
+    optionally filtered by genre, state and city
+    '''
+    rows, next_cursor = keyset_rows(venue_areas_query(cursor, limit, **filters).all(), VENUE_ORDER, limit)
+
+    return group_areas(rows), next_cursor
+
+
+def venues_near(latitude, longitude, radius_km, limit=50):
+    '''
+    Venues within radius_km of a point, nearest first, with their distance in kilometres and
+    number of upcoming shows. The earth_box bound is served by the ix_Venue_location GiST index,
+    and the exact distance then drops the corners of the box.
+    '''
+    origin = func.ll_to_earth(latitude, longitude)
+    location = func.ll_to_earth(Venue.latitude, Venue.longitude)
+    distance = func.earth_distance(origin, location)
+    radius = radius_km * 1000
+
+    rows = db.session.query(
+        Venue.id,
+        Venue.name,
+        Venue.city,
+        Venue.state,
+        Venue.upcoming_shows_count.label('num_upcoming_shows'),
+        distance.label('distance')
+    ).filter(
+        func.earth_box(origin, radius).op('@>')(location),
+        distance <= radius
+    ).order_by(distance, Venue.id).limit(limit)
+
+    return [{
+        'id': r.id,
+        'name': r.name,
+        'city': r.city,
+        'state': r.state,
+        'num_upcoming_shows': r.num_upcoming_shows,
+        'distance_km': round(r.distance / 1000, 1)
+    } for r in rows]
+
+
+def artist_page_query(cursor=None, limit=50, **filters):
+    '''
+    One page of artists ordered by name, optionally filtered by genre, state and city
+    '''
+    query = filter_location(db.session.query(Artist.id, Artist.name), Artist, **filters)
+
+    return keyset_query(query, ARTIST_ORDER, cursor, limit)
+
+
+def artist_page(cursor=None, limit=50, **filters):
+    '''
+    One page of artists ordered by name, optionally filtered by genre, state and city
+    '''
+    rows, next_cursor = keyset_rows(artist_page_query(cursor, limit, **filters).all(), ARTIST_ORDER, limit)
+
+    return [{'id': a.id, 'name': a.name} for a in rows], next_cursor
+
+
+def show_feed():
+    '''
+    Shows joined with their venue and artist, projected to the columns used by format_show
+    '''
+    return db.session.query(
+        Show.id,
+        Show.venue_id,
+        Show.artist_id,
+        Show.start_time,
+        Show.end_time,
+        Show.version,
+        Venue.name.label('venue_name'),
+        Venue.image_link.label('venue_image_link'),
+        Venue.version.label('venue_version'),
+        Artist.name.label('artist_name'),
+        Artist.image_link.label('artist_image_link'),
+        Artist.version.label('artist_version')
+    ).join(
+        Venue, Venue.id == Show.venue_id
+    ).join(
+        Artist, Artist.id == Show.artist_id
+    )
+
+
+def format_show(row):
+    return {
+        'id': row.id,
+        'venue_id': row.venue_id,
+        'artist_id': row.artist_id,
+        'start_time': row.start_time.strftime('%Y-%m-%d %H:%M:%S'),
+        'end_time': row.end_time.strftime('%Y-%m-%d %H:%M:%S'),
+        'venue_name': row.venue_name,
+        'artist_name': row.artist_name,
+        'artist_image_link': row.artist_image_link,
+        'venue_image_link': row.venue_image_link,
+        'version': row.version,
+        'venue_version': row.venue_version,
+        'artist_version': row.artist_version
+    }
+
+
+def show_filters(args):
+    '''
+    The from/to start time range and the venue state and city show filters present in the query
+    string arguments
+    '''
+    return {key: args[key] for key in ('from', 'to', 'state', 'city') if args.get(key)}
+
+
+def _parse_time(value):
+    import dateutil.parser
+
+    try:
+        return dateutil.parser.parse(value)
+    except OverflowError as e:
+        raise ValueError(value) from e
+
+
+def filter_shows(query, filters):
+    '''
+    Restrict a show_feed query to shows starting from 'from' (inclusive) until 'to' (exclusive),
+    a range scan of the start time index, and to venues in a state and city. Raises ValueError
+    on malformed dates.
+    '''
+    if filters.get('from'):
+        query = query.filter(Show.start_time >= _parse_time(filters['from']))
+    if filters.get('to'):
+        query = query.filter(Show.start_time < _parse_time(filters['to']))
+    if filters.get('state'):
+        query = query.filter(Venue.state == filters['state'])
+    if filters.get('city'):
+        query = query.filter(Venue.city == filters['city'])
+    return query
+
+
+def show_page_query(cursor=None, limit=50, filters=None):
+    return keyset_query(filter_shows(show_feed(), filters or {}), SHOW_ORDER, cursor, limit)
+
+
+def show_page(cursor=None, limit=50, filters=None):
+    '''
+    One page of formatted shows ordered by start time, optionally filtered with show_filters
+    '''
+    rows, next_cursor = keyset_rows(show_page_query(cursor, limit, filters).all(), SHOW_ORDER, limit)
+
+    return [format_show(r) for r in rows], next_cursor
+
+
+def split_shows(criterion, now):
+    '''
+    Formatted past and upcoming shows matching the criterion, fetched in one query
+    '''
+    past_shows = []
+    upcoming_shows = []
+
+    for row in show_feed().filter(criterion).order_by(Show.start_time, Show.id):
+        if row.start_time < now:
+            past_shows.append(format_show(row))
+        elif row.start_time > now:
+            upcoming_shows.append(format_show(row))
+
+    return past_shows, upcoming_shows
+
+
+def detail_payload(entity, past_shows, upcoming_shows):
+    '''
+    The formatted venue or artist with its formatted past and upcoming shows, as rendered by
+    the detail pages
+    '''
+    payload = entity.format()
+
+    payload["past_shows_count"] = len(past_shows)
+    payload["upcoming_shows_count"] = len(upcoming_shows)
+
+    payload["past_shows"] = past_shows
+    payload["upcoming_shows"] = upcoming_shows
+
+    return payload
+
+
+def _add_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def show_calendar(year, state=None, city=None, max_areas=25):
+    '''
+    Monthly show counts of a year from the ShowMonth rollup, in total and for the busiest areas
+    (optionally only those of a state and city), as rendered by the calendar heat map
+    '''
+    query = db.session.query(ShowMonth).filter(
+        ShowMonth.month >= date(year, 1, 1),
+        ShowMonth.month < date(year + 1, 1, 1)
+    )
+    if state:
+        query = query.filter(ShowMonth.state == state)
+    if city:
+        query = query.filter(ShowMonth.city == city)
+
+    areas = defaultdict(lambda: [0] * 12)
+    for row in query:
+        areas[(row.state, row.city)][row.month.month - 1] += row.show_count
+
+    busiest = sorted(areas.items(), key=lambda item: (-sum(item[1]), item[0]))[:max_areas]
+
+    calendar = {
+        'year': year,
+        'months': [{
+            'from': date(year, m, 1).isoformat(),
+            'to': _add_month(date(year, m, 1)).isoformat(),
+            'name': date(year, m, 1).strftime('%b')
+        } for m in range(1, 13)],
+        'totals': [sum(counts) for counts in zip(*areas.values())] if areas else [0] * 12,
+        'areas': [{'state': s, 'city': c, 'counts': counts} for (s, c), counts in busiest],
+        'max_count': max((n for counts in areas.values() for n in counts), default=0)
+    }
+    calendar['max_total'] = max(calendar['totals'])
+
+    return calendar
+
+
+def booked_shows(venue_ids, start_time, end_time):
+    '''
+    Shows at the venues overlapping the period from start_time to end_time, found through the
+    GiST index of the double booking constraint rather than by scanning the venues' shows
+    '''
+    return db.session.query(
+        Show.id,
+        Show.venue_id,
+        Show.artist_id,
+        Show.start_time,
+        Show.end_time
+    ).filter(
+        Show.venue_id.in_(venue_ids),
+        func.tsrange(Show.start_time, Show.end_time).op('&&')(func.tsrange(start_time, end_time))
+    )
+
+
+def _slot(start_time, end_time):
+    return {
+        'start_time': start_time.strftime('%Y-%m-%d %H:%M:%S'),
+        'end_time': end_time.strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+
+def availability(venue_id, start_time, end_time):
+    '''
+    The busy slots (shows) of a venue between start_time and end_time, and the free slots between them
+    '''
+    busy = []
+    free = []
+    free_from = start_time
+
+    for row in booked_shows([venue_id], start_time, end_time).order_by(Show.start_time, Show.id):
+        if row.start_time > free_from:
+            free.append(_slot(free_from, row.start_time))
+        busy.append(dict(_slot(row.start_time, row.end_time), show_id=row.id, artist_id=row.artist_id))
+        free_from = max(free_from, row.end_time)
+
+    if free_from < end_time:
+        free.append(_slot(free_from, end_time))
+
+    return {
+        'venue_id': venue_id,
+        'from': start_time.strftime('%Y-%m-%d %H:%M:%S'),
+        'to': end_time.strftime('%Y-%m-%d %H:%M:%S'),
+        'busy': busy,
+        'free': free
+    }
+
+
+# For a venue or artist: the Show column referencing it
+_SHOW_KEYS = {
+    Venue: Show.venue_id,
+    Artist: Show.artist_id
+}
+
+
+def detail_validator_query(model, id, now):
+    '''
+    The validators of a venue or artist detail page, read from its row: updated_at is bumped by
+    every change to its shows (through the show counters) and to the names and images of the
+    other side of its shows. The start of its next show, found through the (venue_id, start_time)
+    / (artist_id, start_time) index, changes the validator when a show starts.
+    '''
+    next_show = select([func.min(Show.start_time)]).where(
+        and_(_SHOW_KEYS[model] == model.id, Show.start_time > now)
+    ).as_scalar()
+
+    return db.session.query(
+        model.version,
+        model.updated_at,
+        next_show.label('next_show')
+    ).filter(model.id == id)
+
+
+def detail_validators(row):
+    '''
+    ETag and Last-Modified of a detail page from its detail_validator_query row
+    '''
+    next_show = row.next_show and row.next_show.isoformat()
+
+    return make_etag(row.version, row.updated_at.isoformat(), next_show), row.updated_at
+
+
+def first_start_time(shows):
+    '''
+    Start time of the earliest of the formatted shows, or None
+    '''
+    if not shows:
+        return None
+    return min(datetime.strptime(s['start_time'], '%Y-%m-%d %H:%M:%S') for s in shows)
+
+
+def _project(fields, row):
+    return {f: list(getattr(row, f)) if f == 'genres' else getattr(row, f) for f in fields}
+
+
+def entities(model, fields=None, ids=None, cursor=None, limit=50):
+    '''
+    Formatted venues or artists, either those with the given ids (in that order) or one page
+    ordered by name. With fields, only those columns are loaded and returned.
+    '''
+    if fields:
+        query = db.session.query(*[getattr(model, f) for f in set(fields) | {'id', 'name'}])
+        format = lambda row: _project(fields, row)
+    else:
+        query = model.query
+        format = lambda obj: obj.format()
+
+    if ids is not None:
+        rows = {r.id: r for r in query.filter(model.id.in_(ids))}
+        return [format(rows[i]) for i in ids if i in rows], None
+
+    rows, next_cursor = keyset_page(query, [model.name, model.id], cursor, limit)
+
+    return [format(r) for r in rows], next_cursor
+
+
+def shows(fields=None, ids=None, cursor=None, limit=50):
+    '''
+    Formatted shows, either those with the given ids (in that order) or one page ordered by start time
+    '''
+    if ids is not None:
+        rows = {r.id: r for r in show_feed().filter(Show.id.in_(ids))}
+        data, next_cursor = [format_show(rows[i]) for i in ids if i in rows], None
+    else:
+        data, next_cursor = show_page(cursor, limit)
+
+    if fields:
+        data = [{f: s[f] for f in fields} for s in data]
+
+    return data, next_cursor
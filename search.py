@@ -0,0 +1,62 @@
+from sqlalchemy import or_, func, case, desc
+
+from choices import genres_choices
+from models import db, Venue, Artist
+
+
+def _escape_like(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _matching_genres(term):
+    term = term.lower()
+    return [value for _, value in genres_choices if term in value.lower()]
+
+
+def ranked_search_query(model, term, limit):
+    '''
+    Match the search term against name, city and genres, ranked by trigram similarity
+    '''
+    term = (term or '').strip()
+    pattern = '%{}%'.format(_escape_like(term))
+    genres = _matching_genres(term) if term else []
+
+    conditions = [
+        model.name.ilike(pattern, escape='\\'),
+        model.city.ilike(pattern, escape='\\')
+    ]
+    rank = func.greatest(func.similarity(model.name, term), func.similarity(model.city, term) * 0.5)
+
+    if genres:
+        genre_match = model.genres.overlap(genres)
+        conditions.append(genre_match)
+        rank = rank + case([(genre_match, 0.25)], else_=0)
+
+    return db.session.query(
+        model.id,
+        model.name,
+        model.upcoming_shows_count.label('num_upcoming_shows')
+    ).filter(
+        or_(*conditions)
+    ).order_by(
+        desc(rank), model.name, model.id
+    ).limit(limit)
+
+
+def format_results(rows):
+    return {
+        'count': len(rows),
+        'data': [{
+            'id': r.id,
+            'name': r.name,
+            'num_upcoming_shows': r.num_upcoming_shows
+        } for r in rows]
+    }
+
+
+def search_venues(term, limit):
+    return format_results(ranked_search_query(Venue, term, limit).all())
+
+
+def search_artists(term, limit):
+    return format_results(ranked_search_query(Artist, term, limit).all())
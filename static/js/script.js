@@ -2,3 +2,33 @@ window.parseISOString = function parseISOString(s) {
   var b = s.split(/\D+/);
   return new Date(Date.UTC(b[0], --b[1], b[2], b[3], b[4], b[5], b[6]));
 };
+
+// Name lookup for id fields: <input data-autocomplete="venue|artist" data-url="/autocomplete"
+// data-target="#venue_id" list="..."> fills its datalist as the user types and copies the id
+// of the chosen name into the target field
+$(function() {
+  $('[data-autocomplete]').each(function() {
+    var input = $(this);
+    var options = $('#' + input.attr('list'));
+    var target = $(input.data('target'));
+    var pending;
+
+    input.on('input', function() {
+      var chosen = /#(\d+)$/.exec(input.val());
+      if (chosen) {
+        target.val(chosen[1]);
+        return;
+      }
+
+      clearTimeout(pending);
+      pending = setTimeout(function() {
+        $.getJSON(input.data('url'), {q: input.val(), type: input.data('autocomplete')}, function(matches) {
+          options.empty();
+          $.each(matches, function(_, match) {
+            $('<option>').val(match.name + ' #' + match.id).appendTo(options);
+          });
+        });
+      }, 100);
+    });
+  });
+});
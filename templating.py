@@ -0,0 +1,67 @@
+import os
+
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+
+from cache import LRUCache
+
+
+class FragmentCacheExtension(Extension):
+    '''
+    {% cache 'name', key... %}...{% endcache %} renders its body once per key and then reuses the
+    markup. Keys must identify everything the body renders, e.g. an entity id and version.
+    '''
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        # The template and line keep fragments of different tags apart
+        key = [nodes.Const(parser.name), nodes.Const(lineno), parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            key.append(parser.parse_expression())
+
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+
+        return nodes.CallBlock(
+            self.call_method('_render', [nodes.Tuple(key, 'load')]), [], [], body
+        ).set_lineno(lineno)
+
+    def _render(self, key, caller):
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+
+        markup = cache.get(key)
+        if markup is None:
+            markup = caller()
+            cache.set(key, markup)
+        return markup
+
+
+class Templating:
+    '''
+    Persistent compiled template cache shared by the workers, and the bounded fragment cache
+    behind the {% cache %} tag
+    '''
+
+    def init_app(self, app):
+        env = app.jinja_env
+
+        if app.config['TEMPLATE_BYTECODE_CACHE']:
+            # Without a directory Jinja uses a private per-user directory under the temp dir
+            directory = app.config['TEMPLATE_BYTECODE_CACHE_DIR']
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            env.bytecode_cache = FileSystemBytecodeCache(directory)
+
+        env.add_extension(FragmentCacheExtension)
+        if app.config['FRAGMENT_CACHE_SIZE']:
+            env.fragment_cache = LRUCache(app.config['FRAGMENT_CACHE_SIZE'])
+
+
+templating = Templating()
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip('asyncpg')
+
+from aio import async_db
+from asgi import AsgiApp
+
+
+def _request(asgi_app, method, path, body=b''):
+    '''
+    Send one request through the ASGI app and return its status, headers and body
+    '''
+    async def run():
+        messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            'type': 'http', 'http_version': '1.1', 'method': method, 'scheme': 'http', 'root_path': '',
+            'path': path, 'query_string': b'', 'server': ('localhost', 80),
+            'headers': [(b'host', b'localhost'), (b'content-type', b'application/x-www-form-urlencoded')]
+        }
+        try:
+            await asgi_app(scope, receive, send)
+        finally:
+            # The pooled connections belong to this event loop
+            await async_db.dispose(asgi_app.app)
+        return sent
+
+    start, body = asyncio.run(run())
+    return start['status'], dict(start['headers']), body['body']
+
+
+@pytest.fixture
+def asgi_app(app):
+    asgi_app = AsgiApp(app)
+    yield asgi_app
+    asgi_app.executor.shutdown()
+
+
+def test_async_detail_pages_match_the_sync_pages(seed, client, asgi_app):
+    venue, = seed.venues(1)
+    artist, = seed.artists(1)
+    seed.shows(venue, artist, 4)
+
+    for path in ('/venues/{}'.format(venue.id), '/artists/{}'.format(artist.id)):
+        status, headers, body = _request(asgi_app, 'GET', path)
+        response = client.get(path)
+
+        assert status == 200
+        assert headers[b'etag'].decode() == response.headers['ETag']
+        assert artist.name.encode() in body and venue.name.encode() in body
+
+    assert _request(asgi_app, 'GET', '/venues/{}'.format(venue.id + 1))[0] == 404
+
+
+def test_async_search_reads_the_form(seed, asgi_app):
+    seed.venues(1)
+
+    status, headers, body = _request(asgi_app, 'POST', '/venues/search', b'search_term=Venue')
+    assert status == 200 and b'Venue 0' in body
+
+
+def test_other_routes_run_in_the_wsgi_app(seed, asgi_app):
+    seed.venues(1)
+
+    status, headers, body = _request(asgi_app, 'GET', '/api/v1/venues')
+    assert status == 200 and headers[b'content-type'] == b'application/json'
@@ -0,0 +1,27 @@
+import pytest
+
+from pagination import encode_cursor
+
+
+@pytest.mark.parametrize('url, values', [
+    ('/artists', ['x', 'y']),
+    ('/artists', ['Artist', True]),
+    ('/venues', ['NY', 'New York', 'Venue', '1']),
+    ('/venues', ['NY', 'New York', 'Venue\x00', 1]),
+    ('/shows', ['yesterday', 1]),
+    ('/shows', [1, 1]),
+    ('/api/v1/artists', [None, 1]),
+])
+def test_cursors_of_the_wrong_types_are_rejected(seed, client, url, values):
+    seed.venues(1)
+
+    assert client.get(url, query_string={'after': encode_cursor(values)}).status_code == 400
+
+
+def test_cursors_of_the_column_types_are_accepted(seed, client):
+    venue, = seed.venues(1)
+    artist, = seed.artists(1)
+    seed.shows(venue, artist, 2)
+
+    assert client.get('/artists', query_string={'after': encode_cursor(['', 0])}).status_code == 200
+    assert client.get('/shows', query_string={'after': encode_cursor(['2000-01-01 20:00:00', 0])}).status_code == 200
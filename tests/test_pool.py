@@ -0,0 +1,78 @@
+import re
+import threading
+import time
+
+import pytest
+from sqlalchemy import exc
+
+from models import db
+
+
+def _pool_wait_ms(response):
+    return float(re.search(r'pool;dur=([0-9.]+)', response.headers['Server-Timing']).group(1))
+
+
+def test_requests_queue_for_a_pooled_connection(make_test_app):
+    app = make_test_app(DB_POOL_SIZE=1, DB_MAX_OVERFLOW=0, DB_POOL_TIMEOUT=10)
+
+    with app.app_context():
+        # Hold the only connection, and give it back from another thread while a request waits for it
+        connection = db.get_engine().connect()
+        release = threading.Timer(0.5, connection.close)
+        release.start()
+
+        start = time.perf_counter()
+        response = app.test_client().get('/venues')
+        elapsed = time.perf_counter() - start
+        release.join()
+
+    assert response.status_code == 200
+    assert elapsed >= 0.45
+    assert _pool_wait_ms(response) >= 450
+
+
+def test_concurrent_requests_share_a_small_pool(make_test_app):
+    app = make_test_app(DB_POOL_SIZE=2, DB_MAX_OVERFLOW=0, DB_POOL_TIMEOUT=10)
+    responses = []
+    lock = threading.Lock()
+
+    def request():
+        response = app.test_client().get('/venues')
+        with lock:
+            responses.append(response)
+
+    threads = [threading.Thread(target=request) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [r.status_code for r in responses] == [200] * 20
+    with app.app_context():
+        assert db.get_engine().pool.checkedout() == 0
+
+
+def test_requests_fail_when_no_connection_frees_up_in_time(make_test_app):
+    app = make_test_app(DB_POOL_SIZE=1, DB_MAX_OVERFLOW=0, DB_POOL_TIMEOUT=1)
+
+    with app.app_context():
+        connection = db.get_engine().connect()
+        try:
+            with pytest.raises(exc.TimeoutError):
+                app.test_client().get('/venues')
+        finally:
+            connection.close()
+
+
+def test_statement_timeout_only_applies_to_requests(make_test_app):
+    app = make_test_app(DB_POOL_SIZE=1, DB_MAX_OVERFLOW=0, DB_STATEMENT_TIMEOUT_MS=1234)
+
+    with app.app_context():
+        assert db.session.execute('SHOW statement_timeout').scalar() == '0'
+        db.session.remove()
+
+        with app.test_request_context('/venues'):
+            assert db.session.execute('SHOW statement_timeout').scalar() == '1234ms'
+            db.session.remove()
+
+        assert db.session.execute('SHOW statement_timeout').scalar() == '0'
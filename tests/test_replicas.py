@@ -0,0 +1,143 @@
+'''
+Read routing between the primary and a replica. TEST_REPLICA_DATABASE_URL may name a second
+scratch database, whose tables are created for the tests; without it the replica bind is a
+second engine on the test database.
+'''
+import os
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+
+from cache import detail_cache
+from models import db, Venue
+from tests.conftest import EXTENSIONS, TEST_DATABASE_URL, empty_tables
+
+TEST_REPLICA_DATABASE_URL = os.environ.get('TEST_REPLICA_DATABASE_URL')
+
+NEW_VENUE = {
+    'name': 'The Replica Room',
+    'city': 'New York',
+    'state': 'NY',
+    'address': '1 Main St',
+    'phone': '555-555-5555',
+    'genres': ['Jazz'],
+}
+
+
+@pytest.fixture(scope='module')
+def replica_url(database):
+    if not TEST_REPLICA_DATABASE_URL or TEST_REPLICA_DATABASE_URL == TEST_DATABASE_URL:
+        yield TEST_DATABASE_URL
+        return
+
+    engine = create_engine(TEST_REPLICA_DATABASE_URL)
+    with engine.begin() as connection:
+        for extension in EXTENSIONS:
+            connection.execute('CREATE EXTENSION IF NOT EXISTS {}'.format(extension))
+    db.metadata.create_all(engine)
+
+    yield TEST_REPLICA_DATABASE_URL
+
+    db.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def routed(make_test_app, replica_url):
+    '''
+    routed(app, url, method='GET', **kwargs) requests url with the app's test client and returns
+    the response and the set of engines its statements ran on
+    '''
+    def request(app, url, method='GET', client=None, **kwargs):
+        engines = set()
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            engines.add(conn.engine)
+
+        event.listen(Engine, 'before_cursor_execute', record)
+        try:
+            response = (client or app.test_client()).open(url, method=method, **kwargs)
+        finally:
+            event.remove(Engine, 'before_cursor_execute', record)
+
+        assert response.status_code == 200, response.status
+        return response, engines
+
+    yield request
+
+    for url in {TEST_DATABASE_URL, replica_url}:
+        engine = create_engine(url)
+        empty_tables(engine)
+        engine.dispose()
+
+
+def _pinned(response):
+    return any(cookie.startswith('primary_until=') for cookie in response.headers.getlist('Set-Cookie'))
+
+
+def _engines(app):
+    with app.app_context():
+        return db.get_engine(), [db.get_engine(bind=name) for name in app.config['REPLICA_BINDS']]
+
+
+def test_gets_read_from_the_replica(make_test_app, replica_url, routed):
+    app = make_test_app(SQLALCHEMY_REPLICA_URIS=[replica_url])
+    primary, replicas = _engines(app)
+
+    response, engines = routed(app, '/venues')
+
+    assert engines == set(replicas)
+    assert not _pinned(response)
+
+
+def test_each_request_reads_from_a_single_replica(make_test_app, replica_url, routed):
+    app = make_test_app(SQLALCHEMY_REPLICA_URIS=[replica_url] * 8)
+    primary, replicas = _engines(app)
+
+    for url in {TEST_DATABASE_URL, replica_url}:
+        engine = create_engine(url)
+        with engine.begin() as connection:
+            connection.execute(Venue.__table__.insert(), dict(NEW_VENUE, id=1))
+        engine.dispose()
+
+    # The detail page checks its validators, then loads the venue and its shows
+    for _ in range(5):
+        with app.app_context():
+            detail_cache.clear()
+        response, engines = routed(app, '/venues/1')
+        assert len(engines) == 1
+        assert engines < set(replicas)
+
+
+def test_writes_and_the_reads_following_them_use_the_primary(make_test_app, replica_url, routed):
+    app = make_test_app(SQLALCHEMY_REPLICA_URIS=[replica_url], REPLICA_PIN_SECONDS=60)
+    primary, replicas = _engines(app)
+    client = app.test_client()
+
+    response, engines = routed(app, '/venues/create', 'POST', client=client, data=NEW_VENUE)
+    assert engines == {primary}
+    assert _pinned(response)
+
+    # The client's reads stay on the primary while the cookie is valid, so it sees its own write
+    response, engines = routed(app, '/venues', client=client)
+    assert engines == {primary}
+    assert NEW_VENUE['name'] in response.get_data(as_text=True)
+
+    # Other clients still read from the replica
+    response, engines = routed(app, '/venues')
+    assert engines == set(replicas)
+
+
+def test_reads_use_the_primary_without_replicas(make_test_app, routed):
+    app = make_test_app(SQLALCHEMY_REPLICA_URIS=[])
+    primary, replicas = _engines(app)
+
+    assert replicas == []
+
+    response, engines = routed(app, '/venues')
+    assert engines == {primary}
+
+    response, engines = routed(app, '/venues/create', 'POST', data=NEW_VENUE)
+    assert engines == {primary}
+    assert not _pinned(response)
@@ -0,0 +1,98 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import exc
+
+from cache import detail_cache
+from models import db, Artist, Show
+
+
+@pytest.fixture
+def bookings(seed):
+    '''
+    One venue and a few artists, and a function adding count shows of each artist at the venue
+    '''
+    venue, = seed.venues(1)
+    artists = seed.artists(5)
+
+    def add(count):
+        for artist in artists:
+            seed.shows(venue, artist, count)
+
+    add.venue_id = venue.id
+    add.artist_id = artists[0].id
+    return add
+
+
+def _cold_count(count_statements, url):
+    detail_cache.clear()
+    return count_statements(url)
+
+
+@pytest.mark.parametrize('url', ['/shows', '/venues/{venue_id}', '/artists/{artist_id}'])
+def test_statements_do_not_grow_with_the_number_of_shows(bookings, count_statements, url):
+    url = url.format(venue_id=bookings.venue_id, artist_id=bookings.artist_id)
+
+    bookings(2)
+    few = _cold_count(count_statements, url)
+
+    bookings(100)
+    many = _cold_count(count_statements, url)
+
+    assert few == many
+
+
+def test_cached_detail_pages_issue_only_the_validator_query(bookings, count_statements):
+    bookings(10)
+    url = '/venues/{}'.format(bookings.venue_id)
+
+    assert _cold_count(count_statements, url) == 3
+    assert count_statements(url) == 1
+
+
+def test_shows_last_at_least_a_minute(seed, client):
+    venue, = seed.venues(1)
+    artist, = seed.artists(1)
+    show = {'venue_id': venue.id, 'artist_id': artist.id, 'start_time': '2030-01-01 20:00:00'}
+
+    client.post('/shows/create', data=dict(show, duration=120))
+    # An empty period overlaps nothing, so it would slip into the booked slot
+    client.post('/shows/create', data=dict(show, start_time='2030-01-01 21:00:00', duration=0))
+
+    assert Show.query.count() == 1
+
+    start_time = datetime(2030, 1, 2, 20)
+    db.session.add(Show(venue.id, artist.id, start_time, start_time))
+    with pytest.raises(exc.IntegrityError, match='ck_Show_end_time'):
+        db.session.commit()
+    db.session.rollback()
+
+
+def test_pages_showing_flashed_messages_get_no_validators(bookings, client):
+    url = '/venues/{}'.format(bookings.venue_id)
+    etag = client.get(url).headers['ETag']
+
+    with client.session_transaction() as session:
+        session['_flashes'] = [('message', 'Venue was successfully updated!')]
+
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert 'ETag' not in response.headers
+    assert response.cache_control.no_store
+
+    # The message has been shown, so the page can be revalidated again
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+
+def test_renaming_an_artist_changes_the_validators_of_its_venues(bookings, client):
+    bookings(1)
+    url = '/venues/{}'.format(bookings.venue_id)
+    etag = client.get(url).headers['ETag']
+
+    artist = Artist.query.get(bookings.artist_id)
+    artist.name = 'Renamed Artist'
+    artist.update()
+
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert 'Renamed Artist' in response.get_data(as_text=True)
@@ -0,0 +1,14 @@
+def test_venues_issues_one_statement_whatever_the_number_of_venues(seed, count_statements):
+    seed.venues(3)
+    few = count_statements('/venues')
+
+    seed.venues(500, cities=40)
+    many = count_statements('/venues')
+
+    assert few == many == 1
+
+
+def test_filtered_venues_issue_one_statement(seed, count_statements):
+    seed.venues(200)
+
+    assert count_statements('/venues?state=NY&genre=Jazz') == 1
@@ -0,0 +1,4 @@
+'''
+Blueprints of the HTML pages. The form views import the forms module, and with it WTForms,
+when they are first used rather than when the app is created.
+'''
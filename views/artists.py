@@ -0,0 +1,198 @@
+from datetime import datetime
+
+from flask import Blueprint, abort, current_app, flash, redirect, render_template, request, url_for
+
+import search
+from cache import detail_cache
+from choices import genres_choices, state_choices
+from conditional import make_etag, not_modified, conditional
+from models import db, Artist, Show
+from queries import artist_page, split_shows, first_start_time, detail_payload, location_filters, \
+    detail_validator_query, detail_validators
+
+blueprint = Blueprint('artists', __name__)
+
+
+@blueprint.route('/artists')
+def artists():
+
+    filters = location_filters(request.args)
+
+    try:
+        data, next_cursor = artist_page(request.args.get('after'), current_app.config['PAGE_SIZE'], **filters)
+    except ValueError:
+        abort(400)
+
+    etag = make_etag(data, next_cursor, filters)
+    response = not_modified(etag)
+    if response:
+        return response
+
+    return conditional(render_template('pages/artists.html', artists=data, next_cursor=next_cursor, filters=filters,
+        genres=genres_choices, states=state_choices), etag)
+
+
+@blueprint.route('/artists/search', methods=['POST'])
+def search_artists():
+
+    response = search.search_artists(request.form.get('search_term', ''), current_app.config['SEARCH_RESULT_LIMIT'])
+
+    return render_template('pages/search_artists.html', results=response, search_term=request.form.get('search_term', ''))
+
+
+@blueprint.route('/artists/<int:artist_id>')
+def show_artist(artist_id):
+
+    now = datetime.now()
+    validator = detail_validator_query(Artist, artist_id, now).one_or_none()
+
+    if not validator:
+        abort(404)
+
+    etag, last_modified = detail_validators(validator)
+    response = not_modified(etag, last_modified)
+    if response:
+        return response
+
+    formatted_artist = detail_cache.get('artist', artist_id, etag)
+
+    if not formatted_artist:
+        artist = Artist.query.filter_by(id=artist_id).one_or_none()
+
+        if not artist:
+            abort(404)
+
+        past_shows, upcoming_shows = split_shows(Show.artist_id == artist_id, now)
+
+        formatted_artist = detail_payload(artist, past_shows, upcoming_shows)
+
+        detail_cache.set('artist', artist_id, etag, formatted_artist, first_start_time(upcoming_shows))
+
+    return conditional(render_template('pages/show_artist.html', artist=formatted_artist), etag, last_modified)
+
+#  Update Artist
+#  ----------------------------------------------------------------
+
+@blueprint.route('/artists/<int:artist_id>/edit', methods=['GET'])
+def edit_artist(artist_id):
+    from forms import ArtistForm
+
+    form = ArtistForm()
+    artist = Artist.query.filter_by(id=artist_id).one_or_none()
+
+    if artist:
+        artist = artist.format()
+        form.name.data = artist["name"]
+        form.city.data = artist["city"]
+        form.state.data = artist["state"]
+        form.phone.data = artist["phone"]
+        form.facebook_link.data = artist["facebook_link"]
+        form.image_link.data = artist["image_link"]
+        form.seeking_venue.data = artist["seeking_venue"]
+        form.seeking_description.data = artist["seeking_description"]
+        form.website.data = artist["website"]
+        form.genres.data = artist["genres"]
+
+        return render_template('forms/edit_artist.html', form=form, artist=artist)
+
+    return render_template('errors/404.html')
+
+
+@blueprint.route('/artists/<int:artist_id>/edit', methods=['POST'])
+def edit_artist_submission(artist_id):
+
+    error = False
+
+    artist = Artist.query.filter_by(id=artist_id).one_or_none()
+
+    if artist and artist.version != request.form.get('version', type=int):
+        flash('Artist ' + artist.name + ' was changed by someone else while you were editing it. Review the changes and try again.')
+        return redirect(url_for('artists.edit_artist', artist_id=artist_id))
+
+    name = request.form.get('name')
+    city = request.form.get('city')
+    state = request.form.get('state')
+    phone = request.form.get('phone')
+    image_link = request.form.get('image_link')
+    genres = request.form.getlist('genres')
+    facebook_link = request.form.get('facebook_link')
+
+    seeking_venue = False
+    if 'seeking_venue' in request.form:
+        seeking_venue = request.form['seeking_venue'] == 'y'
+
+    seeking_description = request.form.get('seeking_description')
+
+    website = request.form.get('website')
+
+    try:
+        artist.name = name
+        artist.city = city
+        artist.state = state
+        artist.phone = phone
+        artist.image_link = image_link
+        artist.genres = genres
+        artist.facebook_link = facebook_link
+        artist.seeking_venue = seeking_venue
+        artist.seeking_description = seeking_description
+        artist.website = website
+
+        artist.update()
+
+    except:
+        error = True
+        db.session.rollback()
+
+    if error:
+        flash('An error occurred. Artist ' + request.form['name'] + ' could not be edited.')
+    else:
+        flash('Artist ' + request.form['name'] + ' was successfully edited!')
+
+    return redirect(url_for('artists.show_artist', artist_id=artist_id))
+
+#  Create Artist
+#  ----------------------------------------------------------------
+
+@blueprint.route('/artists/create', methods=['GET'])
+def create_artist_form():
+    from forms import ArtistForm
+
+    form = ArtistForm()
+    return render_template('forms/new_artist.html', form=form)
+
+
+@blueprint.route('/artists/create', methods=['POST'])
+def create_artist_submission():
+
+    error = False
+
+    name = request.form.get('name')
+    city = request.form.get('city')
+    state = request.form.get('state')
+    phone = request.form.get('phone')
+    image_link = request.form.get('image_link')
+    genres = request.form.getlist('genres')
+    facebook_link = request.form.get('facebook_link')
+
+    seeking_venue = False
+    if 'seeking_venue' in request.form:
+        seeking_venue = request.form['seeking_venue'] == 'y'
+
+    seeking_description = request.form.get('seeking_description')
+
+    website = request.form.get('website')
+
+    try:
+        a = Artist(name, city, state, phone, image_link, facebook_link, website, seeking_venue, seeking_description, genres)
+        a.insert()
+
+    except:
+        error = True
+        db.session.rollback()
+
+    if error:
+        flash('An error occurred. Artist ' + request.form['name'] + ' could not be listed.')
+    else:
+        flash('Artist ' + request.form['name'] + ' was successfully listed!')
+
+    return render_template('pages/home.html')
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+from flask import Blueprint, abort, current_app, flash, render_template, request
+from sqlalchemy import exc
+
+from choices import state_choices
+from conditional import make_etag, not_modified, conditional
+from models import db, Show
+from queries import show_page, show_filters, show_calendar
+
+blueprint = Blueprint('shows', __name__)
+
+
+@blueprint.route('/shows')
+def shows():
+
+    filters = show_filters(request.args)
+
+    try:
+        data, next_cursor = show_page(request.args.get('after'), current_app.config['PAGE_SIZE'], filters)
+    except ValueError:
+        abort(400)
+
+    if not data and not filters:
+        abort(404)
+
+    etag = make_etag(data, next_cursor, filters)
+    response = not_modified(etag)
+    if response:
+        return response
+
+    return conditional(render_template('pages/shows.html', shows=data, next_cursor=next_cursor, filters=filters,
+        states=state_choices), etag)
+
+
+@blueprint.route('/shows/calendar')
+def shows_calendar():
+
+    year = request.args.get('year', datetime.now().year, type=int)
+    filters = {key: request.args[key] for key in ('state', 'city') if request.args.get(key)}
+
+    if not 1 <= year <= 9998:
+        abort(400)
+
+    calendar = show_calendar(year, max_areas=current_app.config['CALENDAR_AREAS'], **filters)
+
+    return render_template('pages/shows_calendar.html', calendar=calendar, filters=filters, states=state_choices)
+
+
+@blueprint.route('/shows/create')
+def create_shows():
+    from forms import ShowForm
+
+    form = ShowForm()
+    return render_template('forms/new_show.html', form=form)
+
+
+@blueprint.route('/shows/create', methods=['POST'])
+def create_show_submission():
+    from forms import ShowForm
+
+    form = ShowForm()
+    # The duration must be at least a minute: an empty period overlaps nothing, so the
+    # exclusion constraint would let a zero-length show into a booked slot
+    error = not form.validate()
+    double_booked = False
+
+    if not error:
+        start_time = form.start_time.data
+
+        try:
+            s = Show(form.venue_id.data, form.artist_id.data, start_time,
+                     start_time + timedelta(minutes=form.duration.data))
+            s.insert()
+
+        except exc.IntegrityError as e:
+            # The exclusion constraint rejects shows overlapping another one at the same venue
+            double_booked = 'ex_Show_venue_id_period' in str(e.orig)
+            error = True
+            db.session.rollback()
+
+        except:
+            error = True
+            db.session.rollback()
+
+    if double_booked:
+        flash('The venue is already booked at that time. Show could not be listed.')
+    elif error:
+        flash('An error occurred. Show could not be listed.')
+    else:
+        flash('Show was successfully listed!')
+
+    return render_template('pages/home.html')
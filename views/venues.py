@@ -0,0 +1,249 @@
+from datetime import datetime, timedelta
+
+from flask import Blueprint, abort, current_app, flash, jsonify, redirect, render_template, request, url_for
+
+import search
+from cache import detail_cache
+from choices import genres_choices, state_choices
+from conditional import make_etag, not_modified, conditional
+from models import db, Venue, Show
+from queries import venue_areas, split_shows, first_start_time, detail_payload, location_filters, \
+    detail_validator_query, detail_validators, availability, venues_near as nearby_venues
+
+blueprint = Blueprint('venues', __name__)
+
+
+@blueprint.route('/venues')
+def venues():
+
+    filters = location_filters(request.args)
+
+    try:
+        data, next_cursor = venue_areas(request.args.get('after'), current_app.config['PAGE_SIZE'], **filters)
+    except ValueError:
+        abort(400)
+
+    etag = make_etag(data, next_cursor, filters)
+    response = not_modified(etag)
+    if response:
+        return response
+
+    return conditional(render_template('pages/venues.html', areas=data, next_cursor=next_cursor, filters=filters,
+        genres=genres_choices, states=state_choices), etag)
+
+
+@blueprint.route('/venues/near')
+def venues_near():
+
+    latitude = request.args.get('lat', type=float)
+    longitude = request.args.get('lon', type=float)
+    radius = request.args.get('radius', current_app.config['NEAR_DEFAULT_RADIUS_KM'], type=float)
+    data = None
+
+    if latitude is not None and longitude is not None:
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180 and 0 < radius <= current_app.config['NEAR_MAX_RADIUS_KM']):
+            abort(400)
+        data = nearby_venues(latitude, longitude, radius, current_app.config['PAGE_SIZE'])
+
+    return render_template('pages/venues_near.html', venues=data, latitude=latitude, longitude=longitude, radius=radius)
+
+
+@blueprint.route('/venues/search', methods=['POST'])
+def search_venues():
+
+    response = search.search_venues(request.form.get('search_term', ''), current_app.config['SEARCH_RESULT_LIMIT'])
+
+    return render_template('pages/search_venues.html', results=response, search_term=request.form.get('search_term', ''))
+
+
+@blueprint.route('/venues/<int:venue_id>')
+def show_venue(venue_id):
+
+    now = datetime.now()
+    validator = detail_validator_query(Venue, venue_id, now).one_or_none()
+
+    if not validator:
+        abort(404)
+
+    etag, last_modified = detail_validators(validator)
+    response = not_modified(etag, last_modified)
+    if response:
+        return response
+
+    formatted_venue = detail_cache.get('venue', venue_id, etag)
+
+    if not formatted_venue:
+        venue = Venue.query.filter_by(id=venue_id).one_or_none()
+
+        if not venue:
+            abort(404)
+
+        past_shows, upcoming_shows = split_shows(Show.venue_id == venue_id, now)
+
+        formatted_venue = detail_payload(venue, past_shows, upcoming_shows)
+
+        detail_cache.set('venue', venue_id, etag, formatted_venue, first_start_time(upcoming_shows))
+
+    return conditional(render_template('pages/show_venue.html', venue=formatted_venue), etag, last_modified)
+
+
+@blueprint.route('/venues/<int:venue_id>/availability')
+def venue_availability(venue_id):
+    import dateutil.parser
+
+    try:
+        start_time = dateutil.parser.parse(request.args['from']) if request.args.get('from') else datetime.now()
+        end_time = dateutil.parser.parse(request.args['to']) if request.args.get('to') else start_time + timedelta(days=7)
+    except (ValueError, OverflowError):
+        abort(400)
+
+    if not start_time < end_time <= start_time + timedelta(days=current_app.config['AVAILABILITY_MAX_DAYS']):
+        abort(400)
+
+    if not db.session.query(Venue.id).filter_by(id=venue_id).first():
+        abort(404)
+
+    return jsonify(availability(venue_id, start_time, end_time))
+
+#  Create Venue
+#  ----------------------------------------------------------------
+
+@blueprint.route('/venues/create', methods=['GET'])
+def create_venue_form():
+    from forms import VenueForm
+
+    form = VenueForm()
+    return render_template('forms/new_venue.html', form=form)
+
+
+@blueprint.route('/venues/create', methods=['POST'])
+def create_venue_submission():
+
+    error = False
+
+    name = request.form.get('name')
+    city = request.form.get('city')
+    state = request.form.get('state')
+    address = request.form.get('address')
+    phone = request.form.get('phone')
+    image_link = request.form.get('image_link')
+    genres = request.form.getlist('genres')
+    facebook_link = request.form.get('facebook_link')
+
+    seeking_talent = False
+    if 'seeking_talent' in request.form:
+        seeking_talent = request.form['seeking_talent'] == 'y'
+
+    seeking_description = request.form.get('seeking_description')
+
+    website = request.form.get('website')
+
+    try:
+        v = Venue(name, city, state, address, phone, image_link, facebook_link, website, seeking_talent, seeking_description, genres)
+        v.insert()
+
+    except:
+        error = True
+        db.session.rollback()
+
+    if error:
+        flash('An error occurred. Venue ' + request.form['name'] + ' could not be listed.')
+    else:
+        flash('Venue ' + request.form['name'] + ' was successfully listed!')
+
+    return render_template('pages/home.html')
+
+
+@blueprint.route('/venues/<venue_id>', methods=['DELETE'])
+def delete_venue(venue_id):
+
+    v = Venue.query.get(venue_id)
+
+    if v:
+        v.delete()
+
+    return None
+
+#  Update Venue
+#  ----------------------------------------------------------------
+
+@blueprint.route('/venues/<int:venue_id>/edit', methods=['GET'])
+def edit_venue(venue_id):
+    from forms import VenueForm
+
+    form = VenueForm()
+
+    venue = Venue.query.filter_by(id=venue_id).one_or_none()
+
+    if venue:
+        venue = venue.format()
+        form.name.data = venue["name"]
+        form.address.data = venue["address"]
+        form.city.data = venue["city"]
+        form.state.data = venue["state"]
+        form.phone.data = venue["phone"]
+        form.facebook_link.data = venue["facebook_link"]
+        form.image_link.data = venue["image_link"]
+        form.seeking_talent.data = venue["seeking_talent"]
+        form.seeking_description.data = venue["seeking_description"]
+        form.website.data = venue["website"]
+        form.genres.data = venue["genres"]
+
+        return render_template('forms/edit_venue.html', form=form, venue=venue)
+
+    return render_template('errors/404.html')
+
+
+@blueprint.route('/venues/<int:venue_id>/edit', methods=['POST'])
+def edit_venue_submission(venue_id):
+
+    error = False
+
+    venue = Venue.query.filter_by(id=venue_id).one_or_none()
+
+    if venue and venue.version != request.form.get('version', type=int):
+        flash('Venue ' + venue.name + ' was changed by someone else while you were editing it. Review the changes and try again.')
+        return redirect(url_for('venues.edit_venue', venue_id=venue_id))
+
+    name = request.form.get('name')
+    city = request.form.get('city')
+    state = request.form.get('state')
+    address = request.form.get('address')
+    phone = request.form.get('phone')
+    image_link = request.form.get('image_link')
+    genres = request.form.getlist('genres')
+    facebook_link = request.form.get('facebook_link')
+
+    seeking_talent = False
+    if 'seeking_talent' in request.form:
+        seeking_talent = request.form['seeking_talent'] == 'y'
+
+    seeking_description = request.form.get('seeking_description')
+
+    website = request.form.get('website')
+
+    try:
+        venue.name = name
+        venue.city = city
+        venue.state = state
+        venue.address = address
+        venue.phone = phone
+        venue.image_link = image_link
+        venue.genres = genres
+        venue.facebook_link = facebook_link
+        venue.seeking_talent = seeking_talent
+        venue.seeking_description = seeking_description
+        venue.website = website
+
+        venue.update()
+
+    except:
+        error = True
+        db.session.rollback()
+
+    if error:
+        flash('An error occurred. Venue ' + request.form['name'] + ' could not be edited.')
+    else:
+        flash('Venue ' + request.form['name'] + ' was successfully edited!')
+
+    return redirect(url_for('venues.show_venue', venue_id=venue_id))